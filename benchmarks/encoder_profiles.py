@@ -0,0 +1,103 @@
+"""Encoder profile benchmark.
+
+Renders the start of an animation once to raw yuv420p frames, then encodes
+them with the output section's settings and with every encoder profile, and
+reports encode speed, video size, bitrate and PSNR against the rendered frames.
+Keyframes are forced at speech starts as in a real run (output.keyframes).
+
+Usage: python benchmarks/encoder_profiles.py AUDIO [-c config.yaml] [-a ASSETS] [--seconds N]
+"""
+import re
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+from itertools import islice
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from utils import ENCODER_PROFILES, load_config
+from core.generator import AnimationGenerator
+from renderers.batch_renderer import BatchRenderer
+
+# Raw frames written per block while rendering
+BLOCK_FRAMES = 32
+
+# Render `count` frames to one raw yuv420p file
+def render_raw(generator, count, path):
+    renderer = BatchRenderer(generator.renderer, 'yuv420p')
+    timeline = generator._iter_timeline()
+    with open(path, 'wb') as f:
+        while count > 0:
+            frames = list(islice(timeline, min(BLOCK_FRAMES, count)))
+            if not frames:
+                break
+            block, _ = renderer.render(frames)
+            f.write(block)
+            count -= len(frames)
+
+# Seconds to encode the raw file through the pipeline's stream encoder
+def encode_seconds(generator, raw, size):
+    encoder = generator._encoder()
+    start = time.perf_counter()
+    process = encoder.open_stream(*size, pixel_format='yuv420p', audio=False)
+    with open(raw, 'rb') as f:
+        while True:
+            data = f.read(1 << 24)
+            if not data:
+                break
+            process.stdin.write(data)
+    encoder.finish_stream(process)
+    return time.perf_counter() - start
+
+# Average PSNR (dB) of the encoded video against the rendered frames
+def psnr(video, raw, size, fps) -> float:
+    cmd = [
+        'ffmpeg', '-hide_banner', '-i', video,
+        '-f', 'rawvideo', '-pix_fmt', 'yuv420p', '-s', f'{size[0]}x{size[1]}', '-framerate', str(fps), '-i', raw,
+        '-lavfi', 'psnr', '-f', 'null', '-',
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    match = re.search(r'average:(\S+)', result.stderr)
+    return float(match.group(1)) if match else float('nan')
+
+def main():
+    parser = argparse.ArgumentParser(description="Encoder profile benchmark")
+    parser.add_argument("audio", help="Audio file driving the animation")
+    parser.add_argument("-c", "--config", default=str(ROOT / "config.yaml"), help="Configuration file")
+    parser.add_argument("-a", "--assets", help="Assets directory (overrides config)")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Seconds of animation to encode")
+    args = parser.parse_args()
+
+    overrides = {'assets.directory': args.assets} if args.assets else {}
+    config = load_config(args.config, args.audio, **overrides)
+    config.output.targets = []
+    config.debug.verbose = False
+    generator = AnimationGenerator(config)
+    fps = config.output.fps
+    count = min(generator.analyzer.frames, int(args.seconds * fps))
+    size = generator.renderer.frame_size
+    names = [None] + list(dict.fromkeys([*ENCODER_PROFILES, *config.output.profiles]))
+
+    with tempfile.TemporaryDirectory(prefix="awdioh_bench_") as directory:
+        raw = str(Path(directory) / 'frames.yuv')
+        render_raw(generator, count, raw)
+        keyframes = len([t for t in generator._encoder().keyframes if t < count / fps])
+
+        print(f"{count} frames at {size[0]}x{size[1]}, {keyframes} forced keyframe(s)")
+        print(f"{'profile':<10}{'encode fps':>12}{'MB':>8}{'kbit/s':>9}{'PSNR':>9}")
+        for name in names:
+            config.output.profile = name
+            config.output.video_file = str(Path(directory) / f'{name or "output"}.mp4')
+            seconds = encode_seconds(generator, raw, size)
+            video_bytes = Path(config.output.video_file).stat().st_size
+            label = name or "output"
+            print(f"{label:<10}{count / seconds:>12.1f}{video_bytes / 1e6:>8.2f}"
+                  f"{video_bytes * 8 / 1000 / (count / fps):>9.0f}"
+                  f"{psnr(config.output.video_file, raw, size, fps):>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""ffmpeg backend check.
+
+Builds the ffmpeg compositing graph for the start of an animation, renders it
+losslessly to raw rgb24 frames and compares a few of them, including frame 0
+and frames where the state changes, with FrameRenderer.render_frame. A frame
+that differs is also compared with its neighbours, so a graph running a frame
+ahead or behind the timeline shows up as such.
+
+Usage: python benchmarks/ffmpeg_backend.py AUDIO [-c config.yaml] [-a ASSETS] [--seconds N] [--samples N]
+"""
+import sys
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from utils import load_config
+from core.generator import AnimationGenerator
+from renderers.ffmpeg_compositor import FFmpegCompositor
+
+# Every frame the graph produces for the timeline, as (count, height, width, 3)
+def render_graph(generator, timeline, size):
+    compositor = FFmpegCompositor(generator.assets, generator.config)
+    with tempfile.TemporaryDirectory(prefix="awdioh_check_") as workdir:
+        inputs, graph, video = compositor.build(timeline, workdir)
+        cmd = ['ffmpeg', '-hide_banner', '-loglevel', 'error'] + inputs + [
+            '-filter_complex', ';'.join(graph), '-map', video,
+            '-frames:v', str(len(timeline)), '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-'
+        ]
+        result = subprocess.run(cmd, check=True, capture_output=True)
+    frames = np.frombuffer(result.stdout, dtype=np.uint8)
+    return frames.reshape(-1, size[1], size[0], 3)
+
+# Frame 0, the frames where the state changes and the last frame, up to `count`
+def sample_frames(timeline, count):
+    changes = [i for i in range(1, len(timeline)) if timeline[i] != timeline[i - 1]]
+    step = max(1, len(changes) // max(1, count - 2))
+    picks = [0] + changes[::step][:max(0, count - 2)] + [len(timeline) - 1]
+    return sorted(set(picks))
+
+def differing_pixels(a, b) -> int:
+    return int(np.any(a != b, axis=-1).sum())
+
+def main():
+    parser = argparse.ArgumentParser(description="ffmpeg backend check")
+    parser.add_argument("audio", help="Audio file driving the animation")
+    parser.add_argument("-c", "--config", default=str(ROOT / "config.yaml"), help="Configuration file")
+    parser.add_argument("-a", "--assets", help="Assets directory (overrides config)")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Seconds of animation to check")
+    parser.add_argument("--samples", type=int, default=8, help="Frames to compare")
+    args = parser.parse_args()
+
+    overrides = {'assets.directory': args.assets} if args.assets else {}
+    config = load_config(args.config, args.audio, **overrides)
+    config.debug.verbose = False
+    generator = AnimationGenerator(config)
+    count = min(generator.analyzer.frames, int(args.seconds * config.output.fps))
+    timeline = generator._build_timeline()[:count]
+    size = generator.renderer.frame_size
+
+    graph_frames = render_graph(generator, timeline, size)
+    if len(graph_frames) != len(timeline):
+        print(f"ffmpeg produced {len(graph_frames)} frames for {len(timeline)} timeline frames")
+
+    def python_frame(idx):
+        return np.asarray(generator.renderer.render_frame(timeline[idx]).convert('RGB'))
+
+    failed = 0
+    print(f"{'frame':>7}{'differing px':>15}  note")
+    for idx in sample_frames(timeline, args.samples):
+        if idx >= len(graph_frames):
+            continue
+        diff = differing_pixels(graph_frames[idx], python_frame(idx))
+        note = ""
+        if diff:
+            failed += 1
+            for offset in (1, -1):
+                if 0 <= idx + offset < len(timeline) and not differing_pixels(graph_frames[idx], python_frame(idx + offset)):
+                    note = f"matches python frame {idx + offset}"
+        print(f"{idx:>7}{diff:>15}  {note}")
+
+    print("OK" if not failed else f"{failed} frame(s) differ")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Frame file format benchmark.
+
+Renders a few distinct frames from the configured assets, then writes them
+in every performance.frame_format (and each PNG compress_level given) and
+reports write time, throughput, size on disk and how long ffmpeg takes to
+read them back into an encode.
+
+Usage: python benchmarks/frame_formats.py [-c config.yaml] [-a ASSETS] [--frames N]
+"""
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+from dataclasses import replace
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from utils import load_config
+from core.asset_manager import AssetManager
+from core.animation_state import AnimationState
+from core.encoder import VideoEncoder
+from core.frame_files import PIPED_FORMATS, frame_name, piped_frames, frame_pattern, save_frame
+from renderers.frame_renderer import FrameRenderer
+
+FORMATS = ("png", "raw", "npy", "qoi", "webp")
+
+# One frame per mouth shape, alternating blinks, like a talking stretch
+def render_frames(config, count):
+    assets = AssetManager(config)
+    renderer = FrameRenderer(assets, config)
+    state = AnimationState(config).snapshot(0, 0.0, True)
+    mouths = list(assets.mouths)
+    return [
+        renderer.render_frame(replace(state, mouth=mouths[i % len(mouths)], blinking=i % 5 == 0))
+        for i in range(count)
+    ]
+
+# Seconds for ffmpeg to decode the frames and encode them with ultrafast x264 to nowhere
+def read_seconds(directory, frame_format, count, size):
+    cmd = ['ffmpeg', '-y', '-loglevel', 'error']
+    if frame_format in PIPED_FORMATS:
+        cmd += ['-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{size[0]}x{size[1]}', '-i', '-']
+    else:
+        cmd += ['-i', f'{directory}/{frame_pattern(frame_format)}']
+    cmd += ['-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p', '-f', 'null', '-']
+
+    start = time.perf_counter()
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+    if frame_format in PIPED_FORMATS:
+        for frame in piped_frames(str(directory), frame_format, 0, count, size):
+            process.stdin.write(frame)
+    process.stdin.close()
+    process.wait()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Frame file format benchmark")
+    parser.add_argument("-c", "--config", default=str(ROOT / "config.yaml"), help="Configuration file")
+    parser.add_argument("-a", "--assets", help="Assets directory (overrides config)")
+    parser.add_argument("--frames", type=int, default=24, help="Frames to write per format")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 6], help="PNG compress levels to try")
+    args = parser.parse_args()
+
+    overrides = {'assets.directory': args.assets} if args.assets else {}
+    config = load_config(args.config, "benchmark.wav", **overrides)
+    frames = render_frames(config, args.frames)
+    size = frames[0].size
+    megapixels = size[0] * size[1] * len(frames) / 1e6
+    can_read = VideoEncoder.available()
+
+    variants = [("png", level) for level in args.levels] + [(f, None) for f in FORMATS if f != "png"]
+
+    print(f"{len(frames)} frames at {size[0]}x{size[1]}")
+    print(f"{'format':<10}{'write/frame':>13}{'MP/s':>9}{'MB/frame':>10}{'ffmpeg read':>13}")
+    for frame_format, level in variants:
+        performance = replace(config.performance, frame_format=frame_format)
+        if level is not None:
+            performance.png_compress_level = level
+
+        with tempfile.TemporaryDirectory(prefix="awdioh_bench_") as directory:
+            start = time.perf_counter()
+            for i, frame in enumerate(frames):
+                save_frame(frame, Path(directory) / frame_name(i, frame_format), performance)
+            seconds = time.perf_counter() - start
+
+            total = sum(p.stat().st_size for p in Path(directory).iterdir())
+            read = f"{read_seconds(directory, frame_format, len(frames), size):>12.2f}s" if can_read else f"{'-':>13}"
+
+        label = f"{frame_format}-{level}" if level is not None else frame_format
+        print(f"{label:<10}{seconds / len(frames) * 1000:>11.1f}ms{megapixels / seconds:>9.1f}"
+              f"{total / len(frames) / 1e6:>10.2f}{read}")
+
+if __name__ == "__main__":
+    main()
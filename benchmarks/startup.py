@@ -0,0 +1,61 @@
+"""Startup-time benchmark for the CLI.
+
+Runs commands that should never load the audio stack and reports wall time,
+plus whether librosa/scipy were imported.
+
+Usage: python benchmarks/startup.py [--runs N]
+"""
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+COMMANDS = {
+    "--help": ["main.py", "--help"],
+    "validate": ["main.py", "validate", "-c", "config.yaml"],
+    "missing audio": ["main.py", "does_not_exist.wav"],
+}
+
+HEAVY_MODULES = ("librosa", "scipy", "numpy", "PIL", "tqdm")
+
+def time_command(args, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+# Which heavy top-level packages a command imports
+def heavy_imports(args):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    found = set()
+    for line in result.stderr.splitlines():
+        name = line.rsplit("|", 1)[-1].strip()
+        if name in HEAVY_MODULES:
+            found.add(name)
+    return sorted(found)
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI startup benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per command")
+    args = parser.parse_args()
+
+    baseline = time_command(["-c", "pass"], args.runs)
+    print(f"{'command':<16}{'min':>9}{'median':>9}  heavy imports")
+    print(f"{'python -c pass':<16}{min(baseline):>8.3f}s{statistics.median(baseline):>8.3f}s")
+
+    for label, cmd in COMMANDS.items():
+        samples = time_command(cmd, args.runs)
+        heavy = ", ".join(heavy_imports(cmd)) or "-"
+        print(f"{label:<16}{min(samples):>8.3f}s{statistics.median(samples):>8.3f}s  {heavy}")
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,33 @@
-from .audio_analyzer import AudioAnalyzer
-from .asset_manager import AssetManager
-from .animation_state import AnimationState
-from .generator import AnimationGenerator
+import importlib
+
+# Heavy modules (librosa, scipy, numpy, PIL) only load on first use
+_EXPORTS = {
+    'AudioAnalyzer': '.audio_analyzer',
+    'AssetManager': '.asset_manager',
+    'AnimationState': '.animation_state',
+    'FrameState': '.animation_state',
+    'AnimationGenerator': '.generator',
+    'BatchGenerator': '.batch',
+    'LiveSession': '.live',
+    'SceneGenerator': '.scene',
+}
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        module = importlib.import_module(_EXPORTS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(list(globals()) + list(_EXPORTS))
 
 __all__ = [
     'AudioAnalyzer',
     'AssetManager',
     'AnimationState',
+    'FrameState',
     'AnimationGenerator',
+    'BatchGenerator',
+    'LiveSession',
+    'SceneGenerator',
 ]
@@ -1,14 +1,58 @@
+import copy
+import math
 import random
+from dataclasses import dataclass
 from typing import TYPE_CHECKING, Tuple
 from utils.lerp import LerpValue, LerpPosition
 
 if TYPE_CHECKING:
     from utils import Config
 
+# Seeded per channel, or from OS entropy when no seed is set
+def _channel_rng(seed, channel: str) -> random.Random:
+    return random.Random(None if seed is None else f"{seed}:{channel}")
+
+# Resolved animation values for one frame (one timeline entry)
+@dataclass
+class FrameState:
+    frame_idx: int
+    time: float
+    talking: bool
+    mouth: str
+    blinking: bool
+    eyebrow_raised: bool
+    eyebrow_amount: float
+    eye_offset: Tuple[float, float]
+    head_bob_offset: Tuple[float, float]
+    breathing_offset: Tuple[float, float]
+
+    # Eyebrows and mouth are placed here
+    @property
+    def face_position(self) -> Tuple[int, int]:
+        return (
+            int(self.head_bob_offset[0] + self.breathing_offset[0]),
+            int(self.head_bob_offset[1] + self.breathing_offset[1])
+        )
+
+    # Eyes are placed here
+    @property
+    def eye_position(self) -> Tuple[int, int]:
+        base_x, base_y = self.face_position
+        return (int(self.eye_offset[0]) + base_x, int(self.eye_offset[1]) + base_y)
+
+    # Everything that decides the pixels of this frame
+    def render_key(self) -> tuple:
+        return (self.mouth, self.blinking, self.eyebrow_raised, self.face_position, self.eye_position)
+
 class AnimationState:
     def __init__(self, config: 'Config'):
         self.config = config
 
+        # One RNG per random channel so the state can be checkpointed and
+        # replayed, and tweaking blinks never reshuffles eye darts
+        self.blink_rng = _channel_rng(config.animation.seed, 'blink')
+        self.dart_rng = _channel_rng(config.animation.seed, 'dart')
+
         # Mouth
         self.current_mouth = "closed"
         self.target_mouth = "closed"
@@ -22,7 +66,7 @@ class AnimationState:
         # Eyes - Blinking
         self.blinking = False
         self.blink_progress = 0.0
-        self.blink_timer = random.uniform(
+        self.blink_timer = self.blink_rng.uniform(
             config.animation.blink.min_interval,
             config.animation.blink.max_interval
         )
@@ -58,7 +102,74 @@ class AnimationState:
             self.breathing_offset = LerpPosition(0.0, 0.0, config.animation.breathing.lerp_speed)
         else:
             self.breathing_offset = None
+        self._head_bob_target = (0.0, 0.0)
+        self._breathing_target = (0.0, 0.0)
     
+    # Compact snapshot of everything that evolves between frames
+    def checkpoint(self) -> dict:
+        snapshot = {}
+        for key, value in vars(self).items():
+            if key == 'config':
+                continue
+            if isinstance(value, random.Random):
+                snapshot[key] = value.getstate()
+            else:
+                snapshot[key] = copy.copy(value)
+        return snapshot
+    
+    # Resume from a checkpoint() snapshot
+    def restore(self, snapshot: dict):
+        for key, value in snapshot.items():
+            current = getattr(self, key)
+            if isinstance(current, random.Random):
+                current.setstate(value)
+            else:
+                setattr(self, key, copy.copy(value))
+
+    # Advance every animation channel by one frame
+    def advance(
+        self,
+        time: float,
+        talking: bool,
+        change_point: bool,
+        energy: float,
+        emphasis: bool,
+        dt: float
+    ):
+        self.update_mouth(talking, change_point, energy, dt)
+        self.update_blink(dt)
+        self.update_eye_dart(dt)
+        self.update_eyebrows(emphasis, dt)
+
+        # Head Bob
+        head_offset = self._calculate_head_bob(time, talking)
+        self.update_head_bob(head_offset[0], head_offset[1], dt)
+        self._head_bob_target = head_offset
+
+        # Breathing
+        breathing_offset = self._calculate_breathing(time, talking)
+        self.update_breathing(breathing_offset[0], breathing_offset[1], dt)
+        self._breathing_target = breathing_offset
+
+        # Eye Position
+        eye_offset = self._calculate_eye_position(time)
+        self.update_eye_position(eye_offset[0], eye_offset[1], dt)
+
+    # Current values as a timeline entry
+    def snapshot(self, frame_idx: int, time: float, talking: bool) -> FrameState:
+        return FrameState(
+            frame_idx=frame_idx,
+            time=time,
+            talking=talking,
+            mouth=self.current_mouth,
+            blinking=self.blinking,
+            eyebrow_raised=self.eyebrow_raised,
+            eyebrow_amount=self.get_eyebrow_amount(),
+            eye_offset=self.get_eye_position(),
+            head_bob_offset=self.get_head_bob_offset(self._head_bob_target),
+            breathing_offset=self.get_breathing_offset(self._breathing_target),
+        )
+
     # Update Mouth State
     def update_mouth(self, talking: bool, change_point: bool, energy: float, dt: float):
         if not talking:
@@ -115,7 +226,7 @@ class AnimationState:
             self.blink_progress += dt / self.config.animation.blink.duration
             if self.blink_progress >= 1.0: # Stop blinking if it's time
                 self.blinking = False
-                self.blink_timer = random.uniform(
+                self.blink_timer = self.blink_rng.uniform(
                     self.config.animation.blink.min_interval,
                     self.config.animation.blink.max_interval
                 )
@@ -140,13 +251,18 @@ class AnimationState:
             return
         
         if not self.eye_dart_active:
-            if random.random() < self.config.animation.eyes.dart_chance:
+            # dart_chance is per output frame; a longer step gets the combined odds
+            chance = self.config.animation.eyes.dart_chance
+            steps = round(dt * self.config.output.fps)
+            if steps > 1:
+                chance = 1.0 - (1.0 - chance) ** steps
+            if self.dart_rng.random() < chance:
                 self.eye_dart_active = True
                 self.eye_dart_progress = 0.0
                 self.eye_dart_target = (
-                    random.randint(-self.config.animation.eyes.dart_range_x,
+                    self.dart_rng.randint(-self.config.animation.eyes.dart_range_x,
                                    self.config.animation.eyes.dart_range_x),
-                    random.randint(-self.config.animation.eyes.dart_range_y,
+                    self.dart_rng.randint(-self.config.animation.eyes.dart_range_y,
                                    self.config.animation.eyes.dart_range_y)
                 )
         else:
@@ -202,4 +318,52 @@ class AnimationState:
     def get_breathing_offset(self, calculated_offset: tuple) -> tuple:
         if self.breathing_offset and self.config.animation.breathing.lerp_enabled:
             return self.breathing_offset.get()
-        return calculated_offset
\ No newline at end of file
+        return calculated_offset
+
+    # Head Bob Offset
+    def _calculate_head_bob(self, time: float, talking: bool) -> Tuple[float, float]:
+        if not self.config.animation.head_bob.enabled:
+            return (0.0, 0.0)
+        
+        if self.config.animation.head_bob.only_when_talking and not talking:
+            return (0.0, 0.0)
+        
+        # Oscillate vertically when talking
+        y = math.sin(time * math.pi * 2 * self.config.animation.head_bob.speed)
+        y *= self.config.animation.head_bob.amount
+        
+        return (0.0, y)
+    
+    # Breathing Offset
+    def _calculate_breathing(self, time: float, talking: bool) -> Tuple[float, float]:
+        if not self.config.animation.breathing.enabled:
+            return (0.0, 0.0)
+        
+        # Gentle breathing - reduced when talking
+        scale = self.config.animation.breathing.talking_scale if talking else 1.0
+        y = math.sin(time * math.pi * 2 * self.config.animation.breathing.speed)
+        y *= self.config.animation.breathing.amount * scale
+        
+        return (0.0, y)
+    
+    # Final Eye Position
+    def _calculate_eye_position(self, time: float) -> Tuple[float, float]:
+        # Base drift
+        if self.config.animation.eyes.drift_enabled:
+            base_x = math.sin(time * self.config.animation.eyes.drift_speed) * \
+                     self.config.animation.eyes.drift_amount_x
+            base_y = math.cos(time * self.config.animation.eyes.drift_speed) * \
+                     self.config.animation.eyes.drift_amount_y
+        else:
+            base_x = 0.0
+            base_y = 0.0
+        
+        # Add eye dart
+        if self.eye_dart_active:
+            progress = self.eye_dart_progress
+            # Ease in-out
+            ease = progress * (2 - progress)
+            base_x += self.eye_dart_target[0] * ease
+            base_y += self.eye_dart_target[1] * ease
+        
+        return (base_x, base_y)
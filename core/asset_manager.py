@@ -1,10 +1,19 @@
 from pathlib import Path
 from PIL import Image
-from typing import Dict, TYPE_CHECKING
+from typing import Dict, List, Tuple, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from utils import Config
 
+# Image cropped to its visible pixels, with the crop's offset in the full layer
+Sprite = Tuple[Image.Image, int, int]
+
+def _crop(image: Image.Image) -> Sprite:
+    bbox = image.getchannel('A').getbbox()
+    if bbox is None:
+        return Image.new("RGBA", (1, 1)), 0, 0
+    return image.crop(bbox), bbox[0], bbox[1]
+
 class AssetManager:
     def __init__(self, config: 'Config'):
         self.config = config
@@ -37,11 +46,39 @@ class AssetManager:
             self.has_eyebrows = True
         except (FileNotFoundError, KeyError):
             self.has_eyebrows = False
+
+        self._flatten_layers()
+
+    # Layers are cropped to their visible pixels up front. Without eyebrows a face is
+    # the mouth alone; with them, eyebrows and mouth stay separate sprites pasted in
+    # order, since merging them ahead of time would round alpha differently.
+    def _flatten_layers(self):
+        self.eye_sprites: Dict[bool, Sprite] = {
+            False: _crop(self.eyes_open),
+            True: _crop(self.eyes_closed),
+        }
+
+        eyebrows = {raised: _crop(self.get_eyebrows(raised)) for raised in (False, True)} if self.has_eyebrows else {}
+        self.faces: Dict[Tuple[str, bool], List[Sprite]] = {}
+        for name, mouth in self.mouths.items():
+            mouth_sprite = _crop(mouth)
+            for raised in (False, True):
+                self.faces[name, raised] = [eyebrows[raised], mouth_sprite] if eyebrows else [mouth_sprite]
     
     # Get Mouth by Type
     def get_mouth(self, mouth_type: str) -> Image.Image:
         return self.mouths.get(mouth_type, self.mouths['closed'])
     
+    # Get cropped (Eyebrows +) Mouth sprites, in paste order
+    def get_face(self, mouth_type: str, raised: bool) -> List[Sprite]:
+        if mouth_type not in self.mouths:
+            mouth_type = 'closed'
+        return self.faces[mouth_type, raised]
+
+    # Get cropped Eyes sprite
+    def get_eye_sprite(self, closed: bool) -> Sprite:
+        return self.eye_sprites[closed]
+
     # Get Eyes Image
     def get_eyes(self, closed: bool) -> Image.Image:
         return self.eyes_closed if closed else self.eyes_open
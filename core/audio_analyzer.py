@@ -1,54 +1,145 @@
-import librosa
+import copy
 import numpy as np
-from scipy.ndimage import gaussian_filter1d
-from typing import TYPE_CHECKING
+from typing import Optional, Tuple, TYPE_CHECKING
+
+from core.memory import FRAME_LENGTH, analysis_block_frames
+from core.audio_input import STREAM_BLOCK_FRAMES, open_audio_stream
 
 if TYPE_CHECKING:
     from utils import Config
 
 class AudioAnalyzer:
-    def __init__(self, audio_file: str, config: 'Config'):
+    # `signal` is an already decoded (mono samples, sample rate), e.g. one channel of a scene track
+    def __init__(self, audio_file: str, config: 'Config', signal: Optional[Tuple[np.ndarray, int]] = None):
         self.audio_file = audio_file
         self.config = config
         self.fps = config.output.fps
 
-        # Load Audio
-        self.audio, self.sample_rate = librosa.load(audio_file, sr=None)
+        # Compressed formats are decoded by ffmpeg and analyzed while they stream in
+        stream = open_audio_stream(audio_file, config) if signal is None else None
+        if signal is not None:
+            self.audio, self.sample_rate = signal
+        elif stream is not None:
+            self.audio = None
+            self.sample_rate = stream.sample_rate
+        else:
+            # Load Audio (librosa is slow to import, so only pull it in here)
+            import librosa
+            self.audio, self.sample_rate = librosa.load(audio_file, sr=config.audio.sample_rate)
         self.hop_length = int(self.sample_rate / self.fps)
 
         # Analyze Audio
-        self._analyze()
+        self._analyze(stream)
     
-    def _analyze(self):
+    def _analyze(self, stream=None):
+        import librosa
+        from scipy.ndimage import gaussian_filter1d
+
+        block = analysis_block_frames(self.config)
+
         # Loudness/Energy (Root Mean Square)
-        self.rms = librosa.feature.rms(y=self.audio, hop_length=self.hop_length)[0]
-        self.rms = self.rms / np.max(self.rms) if np.max(self.rms) > 0 else self.rms
+        rms = lambda y, center: librosa.feature.rms(y=y, hop_length=self.hop_length, center=center)[0]
 
         # Pitch (fundamental frequency)
-        self.f0 = librosa.yin(
-            self.audio,
+        pitch = lambda y, center: librosa.yin(
+            y,
             fmin=self.config.audio.pitch_min,
             fmax=self.config.audio.pitch_max,
             sr=self.sample_rate,
-            hop_length=self.hop_length
+            hop_length=self.hop_length,
+            center=center
         )
+
+        if stream is None:
+            self.rms = self._framewise(rms, block)
+            self.f0 = self._framewise(pitch, block)
+        else:
+            self.rms, self.f0 = self._streamed((rms, pitch), stream, block or STREAM_BLOCK_FRAMES)
+
+        self.rms = self.rms / np.max(self.rms) if np.max(self.rms) > 0 else self.rms
         self.f0 = np.nan_to_num(self.f0) # NaN to 0
         self.f0 = gaussian_filter1d(self.f0, sigma=self.config.audio.pitch_smoothing) # Smoothing
 
         # Rates of Chance
         self.energy_delta = np.diff(self.rms, prepend=self.rms[0])
         self.pitch_delta = np.abs(np.diff(self.f0, prepend=self.f0[0]))
+        self.change_pitch_threshold = np.percentile(self.pitch_delta, 90)
 
-        # Detect Speech Segments
-        self.speech_segments = self._detect_speech_segments()
-
-        # Detect Emphasis Points
-        self.emphasis_points = self._detect_emphasis()
+        # Detect Speech Segments and Emphasis Points
+        self._detect_events()
 
         # Frame Count
         self.frames = len(self.rms)
         self.duration = self.frames / self.fps
     
+    # Frame-wise feature of the whole file, computed `block` frames at a time when set.
+    # Blocks are cut from the centered, zero padded signal, so results are unchanged.
+    def _framewise(self, feature, block: Optional[int]) -> np.ndarray:
+        if block is None:
+            return feature(self.audio, True)
+
+        padded = np.pad(self.audio, FRAME_LENGTH // 2)
+        frames = 1 + len(self.audio) // self.hop_length
+        parts = []
+        for start in range(0, frames, block):
+            end = min(frames, start + block)
+            parts.append(feature(padded[start * self.hop_length:(end - 1) * self.hop_length + FRAME_LENGTH], False))
+        return np.concatenate(parts)
+
+    # Frame-wise features over decoded blocks as they arrive, matching _framewise:
+    # the signal is zero padded by half a window at both ends and each feature runs
+    # uncentered on the frames whose windows are complete. Only about `block`
+    # frames of samples are held at once.
+    def _streamed(self, features, stream, block: int):
+        hop = self.hop_length
+        pending = np.zeros(FRAME_LENGTH // 2, dtype=np.float32)
+        parts = [[] for _ in features]
+        samples = done = 0
+
+        def run(count: int):
+            window = pending[:(count - 1) * hop + FRAME_LENGTH]
+            for part, feature in zip(parts, features):
+                part.append(feature(window, False))
+
+        for chunk in stream.blocks(block * hop):
+            samples += len(chunk)
+            pending = np.concatenate([pending, chunk])
+            count = (len(pending) - FRAME_LENGTH) // hop + 1
+            if count >= block:
+                run(count)
+                pending = pending[count * hop:]
+                done += count
+
+        # Trailing padding completes the last windows
+        pending = np.concatenate([pending, np.zeros(FRAME_LENGTH // 2, dtype=np.float32)])
+        if 1 + samples // hop > done:
+            run(1 + samples // hop - done)
+        return tuple(np.concatenate(part) for part in parts)
+
+    # Thresholded events (cheap, depends on the audio thresholds only)
+    def _detect_events(self):
+        self.speech_segments = self._detect_speech_segments()
+        self.emphasis_points = self._detect_emphasis()
+    
+    # Share decoded features with a config that only differs in thresholds
+    def rebind(self, config: 'Config') -> 'AudioAnalyzer':
+        analyzer = copy.copy(self)
+        analyzer.config = config
+        analyzer._detect_events()
+        return analyzer
+    
+    # Extended with silence to `frames`, so tracks of different lengths share one clock
+    def padded(self, frames: int) -> 'AudioAnalyzer':
+        extra = frames - self.frames
+        if extra <= 0:
+            return self
+        analyzer = copy.copy(self)
+        for name in ('rms', 'f0', 'energy_delta', 'pitch_delta', 'speech_segments', 'emphasis_points'):
+            setattr(analyzer, name, np.pad(getattr(self, name), (0, extra)))
+        analyzer.frames = frames
+        analyzer.duration = frames / self.fps
+        return analyzer
+
     # Detect Speech Segments
     def _detect_speech_segments(self) -> np.ndarray:
         return self.rms > (np.mean(self.rms) * 0.5)
@@ -76,10 +167,9 @@ class AudioAnalyzer:
 
     # Check for Mouth Change at Frame
     def is_change_point(self, frame_idx: int) -> bool:
-        pitch_threshold = np.percentile(self.pitch_delta, 90)
         return (
             self.energy_delta[frame_idx] > self.config.audio.mouth_change_energy or
-            self.pitch_delta[frame_idx] > pitch_threshold
+            self.pitch_delta[frame_idx] > self.change_pitch_threshold
         )
 
     # Get Normalized Energy at Frame
@@ -0,0 +1,63 @@
+import re
+import subprocess
+import numpy as np
+from pathlib import Path
+from typing import Iterator, Optional, TYPE_CHECKING
+
+from core.encoder import VideoEncoder
+
+if TYPE_CHECKING:
+    from utils import Config
+
+# Read directly by libsndfile through librosa.load, no decoder process needed
+PCM_SUFFIXES = ('.wav', '.flac', '.aif', '.aiff')
+
+# Frames of samples per pipe read when nothing sets a block size (one minute at 24 fps)
+STREAM_BLOCK_FRAMES = 1440
+
+# Mono float32 PCM decoded by ffmpeg at a fixed rate, read from a pipe in blocks,
+# so the decoded signal never exists in memory as a whole
+class FFmpegAudioStream:
+    def __init__(self, path: str, sample_rate: Optional[int] = None):
+        self.path = path
+        self.sample_rate = sample_rate or probe_sample_rate(path)
+
+    def blocks(self, size: int) -> Iterator[np.ndarray]:
+        cmd = [
+            'ffmpeg', '-loglevel', 'error', '-i', self.path,
+            '-vn', '-ac', '1', '-ar', str(self.sample_rate),
+            '-f', 'f32le', '-',
+        ]
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        block_bytes = size * 4
+        try:
+            while True:
+                data = process.stdout.read(block_bytes)
+                if not data:
+                    break
+                yield np.frombuffer(data, dtype='<f4')
+        finally:
+            process.stdout.close()
+            stderr = process.stderr.read()
+            if process.wait() != 0:
+                raise subprocess.CalledProcessError(process.returncode, cmd, stderr=stderr)
+
+# Sample rate of the first audio stream, from ffmpeg's input summary (there may be no ffprobe)
+def probe_sample_rate(path: str) -> int:
+    result = subprocess.run(['ffmpeg', '-hide_banner', '-i', path], capture_output=True, text=True)
+    match = re.search(r'Audio: .*?(\d+) Hz', result.stderr)
+    if not match:
+        raise ValueError(f"No audio stream found in {path}")
+    return int(match.group(1))
+
+# Streaming decoder for inputs librosa would hand to audioread (MP3, M4A, Opus, ...),
+# None to load the whole file with librosa
+def open_audio_stream(audio_file: str, config: 'Config') -> Optional[FFmpegAudioStream]:
+    decoder = config.audio.decoder
+    if decoder == 'librosa':
+        return None
+    if decoder == 'auto' and Path(audio_file).suffix.lower() in PCM_SUFFIXES:
+        return None
+    if not VideoEncoder.available():
+        return None
+    return FFmpegAudioStream(audio_file, config.audio.sample_rate)
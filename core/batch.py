@@ -0,0 +1,183 @@
+import json
+from pathlib import Path
+from dataclasses import asdict, is_dataclass
+from typing import Dict, List, Optional, Tuple
+from multiprocessing import Pool
+
+from utils import Config
+from core.audio_analyzer import AudioAnalyzer
+from core.asset_manager import AssetManager
+from core.animation_state import FrameState
+from core.generator import AnimationGenerator
+from core.memory import plan_memory
+
+# Generators of a pool worker, sent once by the initializer so tasks only carry (variant, FrameState)
+_worker_generators: Optional[List[AnimationGenerator]] = None
+
+def _init_variant_worker(generators: List[AnimationGenerator]):
+    global _worker_generators
+    _worker_generators = generators
+
+def _render_variant_frame(task: Tuple[int, FrameState]) -> float:
+    idx, frame_state = task
+    return _worker_generators[idx]._render_timeline_frame(frame_state)
+
+# Stable key for one or more config sections
+def _section_key(*parts) -> str:
+    values = [asdict(p) if is_dataclass(p) else p for p in parts]
+    return json.dumps(values, sort_keys=True, default=str)
+
+# output.mp4 -> output_<name>.mp4
+def _suffixed(file: str, name: str) -> str:
+    path = Path(file)
+    return str(path.with_name(f"{path.stem}_{name}{path.suffix}"))
+
+# Render several config variants of the same audio in one job
+class BatchGenerator:
+    def __init__(self, variants: List[Tuple[str, Config]]):
+        if not variants:
+            raise ValueError("BatchGenerator needs at least one config")
+
+        self.names = [name for name, _ in variants]
+        self.configs = [config for _, config in variants]
+        self._shared_frames_dirs = set()
+        self._deconflict_paths()
+
+        # Primary config drives pool size, progress and logging
+        self.config = self.configs[0]
+
+        # Shared analysis and decoded assets, keyed by the sections they depend on
+        self._features: Dict[str, AudioAnalyzer] = {}
+        self._analyzers: Dict[str, AudioAnalyzer] = {}
+        self._assets: Dict[str, AssetManager] = {}
+
+        self.generators: List[AnimationGenerator] = []
+        for config in self.configs:
+            self.generators.append(AnimationGenerator(
+                config,
+                analyzer=self._get_analyzer(config),
+                assets=self._get_assets(config)
+            ))
+
+        self.events = self.generators[0].events
+        self.events.log(f"Variants: {len(self.generators)} "
+                        f"({len(self._features)} analysis pass(es), {len(self._assets)} asset set(s))")
+
+    # Decoding and pitch tracking only depend on the decoding and pitch settings
+    def _get_analyzer(self, config: Config) -> AudioAnalyzer:
+        audio = config.audio
+        feature_key = _section_key(config.audio_file, config.output.fps, audio.sample_rate, audio.decoder,
+                                   audio.pitch_min, audio.pitch_max, audio.pitch_smoothing)
+        key = _section_key(feature_key, audio)
+
+        if key not in self._analyzers:
+            if feature_key in self._features:
+                self._analyzers[key] = self._features[feature_key].rebind(config)
+            else:
+                self._analyzers[key] = AudioAnalyzer(config.audio_file, config)
+                self._features[feature_key] = self._analyzers[key]
+        return self._analyzers[key]
+
+    def _get_assets(self, config: Config) -> AssetManager:
+        key = _section_key(config.assets)
+        if key not in self._assets:
+            self._assets[key] = AssetManager(config)
+        return self._assets[key]
+
+    # Give variants that share an output or frames path their own
+    def _deconflict_paths(self):
+        if len(self.configs) < 2:
+            return
+
+        videos = [t.file for c in self.configs for t in c.output.get_targets()]
+        frames = [c.performance.frames_directory for c in self.configs]
+        for name, config in zip(self.names, self.configs):
+            if any(videos.count(t.file) > 1 for t in config.output.get_targets()):
+                config.output.video_file = _suffixed(config.output.video_file, name)
+                for target in config.output.targets:
+                    if target.file:
+                        target.file = _suffixed(target.file, name)
+            if frames.count(config.performance.frames_directory) > 1:
+                self._shared_frames_dirs.add(config.performance.frames_directory)
+                config.performance.frames_directory = str(Path(config.performance.frames_directory) / name)
+
+    def generate(self):
+        # ffmpeg backend, incremental and streamed variants run on their own; only
+        # variants that write frame files share the pool
+        pooled = []
+        for idx, (name, generator) in enumerate(zip(self.names, self.generators)):
+            if (generator.config.performance.incremental or generator._uses_ffmpeg_backend() or
+                    generator._uses_pipeline()):
+                self.events.log(f"[{name}]")
+                generator.generate()
+            else:
+                pooled.append(idx)
+
+        for idx in pooled:
+            self.generators[idx]._prepare()
+
+        total_frames = sum(self.generators[idx].analyzer.frames for idx in pooled)
+        if self.config.performance.parallel and total_frames > 100:
+            self._generate_parallel(pooled)
+        else:
+            for idx in pooled:
+                generator = self.generators[idx]
+                generator._render_frames(generator._build_timeline())
+
+        for idx in pooled:
+            self.events.log(f"[{self.names[idx]}]")
+            self.generators[idx]._finish()
+
+        # Drop the shared frames directory once every variant has cleaned up
+        for directory in self._shared_frames_dirs:
+            path = Path(directory)
+            if path.is_dir() and not any(path.iterdir()):
+                path.rmdir()
+
+    # One still per variant
+    def save_still(self, time: float):
+        for generator in self.generators:
+            generator.save_still(time)
+
+    # Timeline data for every variant, nothing is rendered
+    def export_timeline(self, fmt: str):
+        for generator in self.generators:
+            generator.export_timeline(fmt)
+
+    # All variants' frames go through a single pool
+    def _generate_parallel(self, pooled: List[int]):
+        # Every worker holds each pooled variant's assets
+        assets = []
+        for idx in pooled:
+            if not any(self.generators[idx].assets is a for a in assets):
+                assets.append(self.generators[idx].assets)
+        frame_size = max((a.base.size for a in assets), key=lambda size: size[0] * size[1])
+        plan = plan_memory(self.config, assets, parallel=True, frame_size=frame_size)
+        num_workers = plan.workers
+
+        events = self.events
+        events.log(f"Parallel Processing w/ {num_workers} Workers...")
+        if plan.budget_mb:
+            events.log(f"Memory plan: {plan.describe()}")
+
+        tasks = []
+        held = {}
+        for idx in pooled:
+            frames, held[idx] = self.generators[idx]._split_held(self.generators[idx]._build_timeline())
+            tasks.extend((idx, frame_state) for frame_state in frames)
+
+        # Build renderers here so workers inherit them; variants outside the pool stay behind
+        generators = [self.generators[idx] if idx in held else None for idx in range(len(self.generators))]
+        for idx in pooled:
+            self.generators[idx].renderer
+
+        progress = events.progress('render', len(tasks), "Rendering frames")
+        progress.set('workers', num_workers)
+        with events.stage('render'), \
+                Pool(num_workers, initializer=_init_variant_worker, initargs=(generators,)) as pool:
+            for busy in pool.imap(_render_variant_frame, tasks, chunksize=4):
+                progress.update(busy=busy)
+        progress.close()
+
+        for idx, frames in held.items():
+            self.generators[idx]._link_held(frames)
@@ -0,0 +1,233 @@
+import math
+import subprocess
+import numpy as np
+from pathlib import Path
+from typing import List, Optional, Tuple, TYPE_CHECKING
+
+from core.frame_files import PIPED_FORMATS, frame_pattern, piped_frames
+
+if TYPE_CHECKING:
+    from utils import Config, OutputTargetConfig
+
+# Codecs whose forced keyframes can be IDR frames, which nothing after them references across
+IDR_CODECS = ('libx264', 'libx265')
+
+# Times (seconds) where speech starts after a pause, at least `min_seconds` apart
+# and from the start of the video (its first frame is a keyframe anyway)
+def speech_keyframes(speech: np.ndarray, fps: int, min_seconds: float) -> List[float]:
+    speech = np.asarray(speech, dtype=bool)
+    onsets = np.flatnonzero(speech[1:] & ~speech[:-1]) + 1
+    times, last = [], 0.0
+    for frame in onsets:
+        time = float(frame / fps)
+        if time - last >= min_seconds:
+            times.append(time)
+            last = time
+    return times
+
+class VideoEncoder:
+    # `keyframes`: times (seconds) that must start a closed GOP, so a cut there needs no re-encode
+    def __init__(self, config: 'Config', keyframes: Optional[List[float]] = None):
+        self.config = config
+        self.targets = config.output.get_targets()
+        self.keyframes = list(keyframes or [])
+        self.threads: Optional[int] = None # encoder threads, split between targets
+
+    # Check if ffmpeg is available
+    @staticmethod
+    def available() -> bool:
+        try:
+            subprocess.run(['ffmpeg', '-version'], capture_output=True, check=True)
+            return True
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            return False
+
+    # Encode a numbered frame sequence to every output target
+    def encode_frames(self, frames_directory: str, count: int, size: Tuple[int, int]):
+        inputs = self._sequence_input(frames_directory, 0, size)
+        cmd = ['ffmpeg', '-y'] + inputs + ['-i', self.config.audio_file]
+        cmd += self._output_args([], '[0:v]', '1:a', keyframes=self.keyframes)
+        self._run_sequence(cmd, frames_directory, 0, count, size)
+
+    # Encode a filter graph output (or input stream) to every output target
+    def encode_graph(self, inputs: List[str], graph: List[str], video: str):
+        audio_index = inputs.count('-i')
+        cmd = ['ffmpeg', '-y'] + inputs + ['-i', self.config.audio_file]
+        cmd += self._output_args(list(graph), video, f'{audio_index}:a', keyframes=self.keyframes)
+        subprocess.run(cmd, check=True, capture_output=True)
+
+    # Start an encoder that reads raw frames (rgb24 or yuv420p) from stdin; with hold > 1
+    # each frame sent stands for `hold` output frames and ffmpeg repeats it.
+    # Without audio the targets hold the video stream alone.
+    def open_stream(self, width: int, height: int, hold: int = 1, pixel_format: str = 'rgb24',
+                    audio: bool = True) -> subprocess.Popen:
+        fps = self.config.output.fps
+        cmd = [
+            'ffmpeg', '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', pixel_format,
+            '-s', f'{width}x{height}',
+            '-framerate', f'{fps}/{hold}' if hold > 1 else str(fps),
+            '-i', '-',
+        ]
+        if audio:
+            cmd += ['-i', self.config.audio_file]
+        cmd += self._output_args([], '[0:v]', '1:a' if audio else None,
+                                 extra=['-r', str(fps)] if hold > 1 else None, keyframes=self.keyframes)
+        return subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    # Encode raw frames with the first target's settings and discard the result
+    def encode_null(self, images: List[bytes], width: int, height: int, threads: int = 1,
+                    pixel_format: str = 'rgb24'):
+        cmd = [
+            'ffmpeg', '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', pixel_format,
+            '-s', f'{width}x{height}',
+            '-framerate', str(self.config.output.fps),
+            '-i', '-',
+        ]
+        cmd += self._target_args(self.targets[0], audio=False)
+        cmd += ['-threads', str(threads), '-f', 'null', '-']
+        subprocess.run(cmd, input=b''.join(images), check=True, capture_output=True)
+
+    # Close a stream's input and wait for the encoder to finish
+    def finish_stream(self, process: subprocess.Popen):
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+        stderr = process.stderr.read()
+        if process.wait() != 0:
+            raise subprocess.CalledProcessError(process.returncode, process.args, stderr=stderr)
+
+    # Encode frames [start, start + count) to video-only segments, one file per target
+    def encode_segment(self, frames_directory: str, start: int, count: int, files: List[str],
+                       size: Tuple[int, int]):
+        cmd = ['ffmpeg', '-y'] + self._sequence_input(frames_directory, start, size)
+        cmd += self._output_args([], '[0:v]', None, files, ['-frames:v', str(count)],
+                                 keyframes=self.segment_keyframes(start, count))
+        self._run_sequence(cmd, frames_directory, start, count, size)
+
+    # Keyframes inside frames [start, start + count), relative to the segment's first frame
+    def segment_keyframes(self, start: int, count: int) -> List[float]:
+        fps = self.config.output.fps
+        begin, end = start / fps, (start + count) / fps
+        return [round(t - begin, 6) for t in self.keyframes if begin < t < end]
+
+    # Input options for frame files from `start` in performance.frame_format
+    def _sequence_input(self, frames_directory: str, start: int, size: Tuple[int, int]) -> List[str]:
+        frame_format = self.config.performance.frame_format
+        fps = str(self.config.output.fps)
+        if frame_format in PIPED_FORMATS:
+            width, height = size
+            return ['-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{width}x{height}', '-framerate', fps, '-i', '-']
+        return [
+            '-framerate', fps,
+            '-start_number', str(start),
+            '-i', f'{frames_directory}/{frame_pattern(frame_format)}',
+        ]
+
+    # Run an encode over frame files; formats ffmpeg cannot read are piped in from memory maps
+    def _run_sequence(self, cmd: List[str], frames_directory: str, start: int, count: int,
+                      size: Tuple[int, int]):
+        frame_format = self.config.performance.frame_format
+        if frame_format not in PIPED_FORMATS:
+            subprocess.run(cmd, check=True, capture_output=True)
+            return
+
+        process = subprocess.Popen(cmd[:2] + ['-loglevel', 'error'] + cmd[2:],
+                                   stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            for frame in piped_frames(frames_directory, frame_format, start, count, size):
+                process.stdin.write(frame)
+        except BrokenPipeError:
+            pass
+        self.finish_stream(process)
+
+    # Join each target's segments without re-encoding and mux in the audio
+    def concat_segments(self, segments: List[List[str]], workdir: str):
+        for i, target in enumerate(self.targets):
+            list_file = Path(workdir) / f'concat_{i}.txt'
+            list_file.write_text(''.join(f"file '{Path(seg[i]).resolve().as_posix()}'\n" for seg in segments))
+
+            cmd = [
+                'ffmpeg', '-y',
+                '-f', 'concat', '-safe', '0', '-i', str(list_file),
+                '-i', self.config.audio_file,
+                '-map', '0:v', '-map', '1:a',
+                '-c:v', 'copy',
+                '-c:a', 'aac',
+                '-b:a', self.config.output.audio_bitrate,
+                '-shortest',
+                target.file
+            ]
+            subprocess.run(cmd, check=True, capture_output=True)
+
+    # Filter graph and per-target output options (no audio when audio is None)
+    def _output_args(
+        self,
+        graph: List[str],
+        video: str,
+        audio: Optional[str],
+        files: Optional[List[str]] = None,
+        extra: Optional[List[str]] = None,
+        keyframes: Optional[List[float]] = None
+    ) -> List[str]:
+        if len(self.targets) == 1 and self.targets[0].size is None:
+            outputs = [video]
+        else:
+            # Decode once, split the stream and scale each branch
+            outputs = [f'[v{i}]' for i in range(len(self.targets))]
+            branches = [video]
+            if len(self.targets) > 1:
+                branches = [f'[s{i}]' for i in range(len(self.targets))]
+                graph.append(f"{video}split={len(self.targets)}{''.join(branches)}")
+            for branch, output, target in zip(branches, outputs, self.targets):
+                if target.size is None:
+                    graph.append(f"{branch}null{output}")
+                else:
+                    width, height = target.size
+                    graph.append(f"{branch}scale={width}:{height}{output}")
+
+        args = ['-filter_complex', ';'.join(graph)] if graph else []
+        files = files or [target.file for target in self.targets]
+        for output, target, file in zip(outputs, self.targets, files):
+            # Input streams are mapped without brackets
+            args += ['-map', output if graph else output.strip('[]')]
+            if audio:
+                args += ['-map', audio]
+            args += self._target_args(target, audio is not None, keyframes)
+            args += (extra or []) + [file]
+        return args
+
+    def _target_args(self, target: 'OutputTargetConfig', audio: bool = True,
+                     keyframes: Optional[List[float]] = None) -> List[str]:
+        args = ['-c:v', target.codec, '-preset', target.preset]
+        if target.tune:
+            args += ['-tune', target.tune]
+        if target.crf is not None:
+            args += ['-crf', str(target.crf)]
+        else:
+            args += ['-b:v', target.bitrate]
+        if target.max_bitrate:
+            args += ['-maxrate', target.max_bitrate, '-bufsize', target.max_bitrate]
+        if target.gop_seconds:
+            args += ['-g', str(max(1, round(target.gop_seconds * self.config.output.fps)))]
+        if keyframes:
+            # Rounded down: a time even slightly after a frame's moves the keyframe to the next one
+            args += ['-force_key_frames', ','.join(f'{math.floor(t * 1000) / 1000:.3f}' for t in keyframes)]
+            if target.codec in IDR_CODECS:
+                args += ['-forced-idr', '1']
+        args += ['-pix_fmt', 'yuv420p']
+        if audio:
+            args += [
+                '-c:a', 'aac',
+                '-b:a', self.config.output.audio_bitrate,
+                '-shortest',  # Match shortest stream
+            ]
+        else:
+            args += ['-an']
+        if self.threads:
+            args += ['-threads', str(max(1, self.threads // len(self.targets)))]
+        elif target.threads:
+            args += ['-threads', str(target.threads)]
+        return args
@@ -0,0 +1,52 @@
+import numpy as np
+from pathlib import Path
+from typing import Iterator, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from PIL import Image
+    from utils import PerformanceConfig
+
+# Formats ffmpeg cannot read as an image sequence; their frames are piped in as rgb24
+PIPED_FORMATS = ("raw", "npy")
+
+SUFFIXES = {'png': '.png', 'raw': '.rgb', 'npy': '.npy', 'qoi': '.qoi', 'webp': '.webp'}
+
+# File name of frame `idx` (frame_0042.png)
+def frame_name(idx: int, frame_format: str) -> str:
+    return f"frame_{idx:04d}{SUFFIXES[frame_format]}"
+
+# ffmpeg image2 pattern for the frame files
+def frame_pattern(frame_format: str) -> str:
+    return f"frame_%04d{SUFFIXES[frame_format]}"
+
+# Write one rendered frame in the configured format.
+# raw and npy hold rgb24 pixels without compression; qoi and webp are lossless.
+def save_frame(image: 'Image.Image', path: Path, performance: 'PerformanceConfig'):
+    frame_format = performance.frame_format
+    if frame_format == 'png':
+        image.save(path, compress_level=performance.png_compress_level)
+    elif frame_format == 'raw':
+        path.write_bytes(image.convert('RGB').tobytes())
+    elif frame_format == 'npy':
+        np.save(path, np.asarray(image.convert('RGB')))
+    elif frame_format == 'webp':
+        image.save(path, lossless=True, method=0, quality=0)
+    else:
+        image.save(path)
+
+# rgb24 pixels of frames [start, start + count), memory-mapped rather than read into memory
+def piped_frames(
+    frames_directory: str,
+    frame_format: str,
+    start: int,
+    count: int,
+    size: Tuple[int, int]
+) -> Iterator[np.ndarray]:
+    width, height = size
+    for idx in range(start, start + count):
+        path = Path(frames_directory) / frame_name(idx, frame_format)
+        if frame_format == 'npy':
+            yield np.load(path, mmap_mode='r')
+        else:
+            yield np.memmap(path, dtype=np.uint8, mode='r', shape=(height, width, 3))
+
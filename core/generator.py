@@ -1,201 +1,299 @@
+import os
+import time
 import subprocess
 import shutil
+import tempfile
 from pathlib import Path
-from typing import Dict
-from tqdm import tqdm
-from multiprocessing import Pool, cpu_count
+from typing import Iterator, List, Optional, Tuple, TYPE_CHECKING
+from multiprocessing import Pool
 
-from utils import Config
+from utils import Config, create_reporter
 from core.audio_analyzer import AudioAnalyzer
 from core.asset_manager import AssetManager
-from core.animation_state import AnimationState
+from core.animation_state import FrameState
+from core.timeline import TimelineIndex, export_timeline, hold_frames, iter_timeline
+from core.encoder import VideoEncoder, speech_keyframes
+from core.frame_files import frame_name, save_frame
+from core.memory import plan_memory
 from renderers.frame_renderer import FrameRenderer
+from renderers.ffmpeg_compositor import FFmpegCompositor
+
+if TYPE_CHECKING:
+    import numpy as np
+    from PIL import Image
+
+# Generator of a pool worker, sent once by the initializer rather than with every frame
+_worker_generator: Optional['AnimationGenerator'] = None
+
+def _init_frame_worker(generator: 'AnimationGenerator'):
+    global _worker_generator
+    _worker_generator = generator
+
+def _render_worker_frame(frame_state: FrameState) -> float:
+    return _worker_generator._render_timeline_frame(frame_state)
 
 class AnimationGenerator:
-    def __init__(self, config: Config):
+    # Analyzer and assets can be passed in to share them between generators
+    def __init__(
+        self,
+        config: Config,
+        analyzer: Optional[AudioAnalyzer] = None,
+        assets: Optional[AssetManager] = None
+    ):
         self.config = config
-        self.analyzer = AudioAnalyzer(config.audio_file, config)
-        self.assets = AssetManager(config)
-        self.renderer = FrameRenderer(self.assets, config)
+        self.events = create_reporter(config)
+        if analyzer is None:
+            with self.events.stage('analysis'):
+                analyzer = self._analyze()
+        self.analyzer = analyzer
+        self._assets = assets
+        self._renderer = None
+        self._timeline_index = None
+        self._last_frame_file: Optional[Path] = None
+    
+    def _analyze(self) -> AudioAnalyzer:
+        return AudioAnalyzer(self.config.audio_file, self.config)
+
+    # Workers only composite, so the audio and analysis stay in the parent
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['analyzer'] = None
+        state['_timeline_index'] = None
+        return state
+
+    # Assets are decoded on first use, so data-only modes never load images
+    @property
+    def assets(self) -> AssetManager:
+        if self._assets is None:
+            self._assets = AssetManager(self.config)
+        return self._assets
+    
+    @property
+    def renderer(self) -> FrameRenderer:
+        if self._renderer is None:
+            self._renderer = FrameRenderer(self.assets, self.config)
+        return self._renderer
     
     def generate(self):
+        if self.config.performance.incremental:
+            from core.incremental import IncrementalBuild
+            IncrementalBuild(self).run()
+            return
+
+        if self._uses_ffmpeg_backend():
+            self._generate_ffmpeg()
+            return
+
+        if self._uses_pipeline():
+            from core.pipeline import FramePipeline
+            FramePipeline(self).run()
+            return
+
+        self._prepare()
+        self._render_frames(self._build_timeline())
+        self._finish()
+    
+    # Render the frame shown at `time` seconds without rendering the rest
+    def render_at(self, time: float) -> 'Image.Image':
+        if self._timeline_index is None:
+            self._timeline_index = TimelineIndex(
+                self.analyzer, self.config, self.config.performance.checkpoint_interval
+            )
+        index = self._timeline_index
+        return self.renderer.render_frame(index.frame_at(index.time_to_frame(time)))
+
+    # Save a single frame next to the output file (frame.png for -o frame.png)
+    def save_still(self, time: float, path: Optional[str] = None) -> Path:
+        path = Path(path or self.config.output.video_file).with_suffix('.png')
+        self.render_at(time).save(path)
+        self.events.output(path, f"Frame at {time:.3f}s")
+        return path
+
+    # Analysis and state pass only, written as animation curves
+    def export_timeline(self, fmt: str, path: Optional[str] = None) -> Path:
+        path = path or self.config.output.video_file
+        timeline = self._build_timeline()
+        saved = export_timeline(timeline, path, fmt, self.config.output.fps, self.config.audio_file)
+        self.events.output(saved, "Timeline")
+        return saved
+
+    # Composite inside ffmpeg, no frames are drawn or written by Python
+    def _uses_ffmpeg_backend(self) -> bool:
+        if self.config.performance.backend != 'ffmpeg':
+            return False
+        if not VideoEncoder.available():
+            self.events.warning("FFmpeg not found, falling back to the python backend")
+            return False
+        return True
+
+    # Stream frames into ffmpeg unless they are meant to stay on disk
+    def _uses_pipeline(self) -> bool:
+        performance = self.config.performance
+        if not performance.pipeline or not performance.cleanup_frames or self.config.debug.keep_frames:
+            return False
+        return VideoEncoder.available()
+
+    def _generate_ffmpeg(self):
+        self.events.log(f"Audio: {self.config.audio_file}")
+        self.events.log(f"Frames: {self.analyzer.frames} at {self.config.output.fps} FPS (ffmpeg backend)")
+
+        timeline = self._build_timeline()
+        compositor = FFmpegCompositor(self.assets, self.config)
+        encoder = self._encoder()
+
+        with tempfile.TemporaryDirectory(prefix="awdioh_") as workdir:
+            inputs, graph, video = compositor.build(timeline, workdir)
+            try:
+                with self.events.stage('encode'):
+                    encoder.encode_graph(inputs, graph, video)
+                for target in encoder.targets:
+                    self.events.output(target.file)
+            except subprocess.CalledProcessError as e:
+                self.events.error("FFmpeg failed")
+                self.events.log(e.stderr.decode())
+
+    # Encoder for this job, with keyframes forced where speech starts
+    def _encoder(self) -> VideoEncoder:
+        output = self.config.output
+        keyframes = []
+        if output.keyframes == 'speech':
+            keyframes = speech_keyframes(self._speech(), output.fps, output.keyframe_min_seconds)
+        return VideoEncoder(self.config, keyframes)
+
+    # Per-frame speech flags
+    def _speech(self) -> 'np.ndarray':
+        return self.analyzer.speech_segments
+
+    # Create frames directory and log job info
+    def _prepare(self):
         output_path = Path(self.config.performance.frames_directory)
-        output_path.mkdir(exist_ok=True)
+        output_path.mkdir(parents=True, exist_ok=True)
 
-        if self.config.debug.verbose:
-            print(f"Audio: {self.config.audio_file}")
-            print(f"Duration: {self.analyzer.duration:.2f}s")
-            print(f"Frames: {self.analyzer.frames} at {self.config.output.fps} FPS")
-        
-        # Generate Frames
-        if self.config.performance.parallel and self.analyzer.frames > 100:
-            self._generate_parallel()
-        else:
-            self._generate_sequential()
-        
-        if self.config.debug.verbose:
-            print(f"Frames saved to {self.config.performance.frames_directory}")
+        self.events.log(f"Audio: {self.config.audio_file}")
+        self.events.log(f"Duration: {self.analyzer.duration:.2f}s")
+        self.events.log(f"Frames: {self.analyzer.frames} at {self.config.output.fps} FPS")
+    
+    # Compile video and clean up frames
+    def _finish(self):
+        self.events.log(f"Frames saved to {self.config.performance.frames_directory}")
 
         # Compile Video
-        self._compile_video()
+        with self.events.stage('encode'):
+            self._compile_video()
 
         # Cleanup
         if self.config.performance.cleanup_frames and not self.config.debug.keep_frames:
-            if self.config.debug.verbose:
-                print("Cleaning Temp Frames...")
+            self.events.log("Cleaning Temp Frames...")
             shutil.rmtree(self.config.performance.frames_directory)
-            if self.config.debug.verbose:
-                print("Cleanup Complete")
+            self.events.log("Cleanup Complete")
     
-    def _generate_sequential(self):
-        state = AnimationState(self.config)
-        dt = 1.0 / self.config.output.fps
+    # Render and save timeline frames, in a pool for larger jobs
+    def _render_frames(self, frames: List[FrameState]):
+        frames, held = self._split_held(frames)
+        self._last_frame_file = None
+        with self.events.stage('render'):
+            if self.config.performance.parallel and len(frames) > 100:
+                self._render_parallel(frames)
+            else:
+                self._render_sequential(frames)
+            self._link_held(held)
 
-        iterator = range(self.analyzer.frames)
-        if self.config.debug.show_progress:
-            iterator = tqdm(iterator, desc="Generating frames")
-        
-        for i in iterator:
-            self._generate_frame(i, state, dt)
-    
-    def _generate_parallel(self):
-        num_workers = self.config.performance.num_workers or max(1, cpu_count() - 1)
+    # (frames to composite, held frames whose tick is composited alongside them)
+    def _split_held(self, frames: List[FrameState]) -> Tuple[List[FrameState], List[FrameState]]:
+        hold = hold_frames(self.config)
+        if hold == 1:
+            return frames, []
 
-        if self.config.debug.verbose:
-            print(f"Parallel Processing w/ {num_workers} Workers...")
-        
-        # Pre-compute all state transitions
-        frame_data = self._precompute_states()
+        ticks = {f.frame_idx for f in frames if f.frame_idx % hold == 0}
+        rendered, held = [], []
+        for frame_state in frames:
+            if frame_state.frame_idx % hold and frame_state.frame_idx - frame_state.frame_idx % hold in ticks:
+                held.append(frame_state)
+            else:
+                rendered.append(frame_state)
+        return rendered, held
 
-        # Render in parallel
-        with Pool(num_workers) as pool:
-            iterator = pool.imap(self._render_frame_data, frame_data)
+    # Held frames reuse their tick's file instead of being composited again
+    def _link_held(self, held: List[FrameState]):
+        hold = hold_frames(self.config)
+        frame_format = self.config.performance.frame_format
+        directory = Path(self.config.performance.frames_directory)
+        for frame_state in held:
+            tick = directory / frame_name(frame_state.frame_idx - frame_state.frame_idx % hold, frame_format)
+            _link_frame(tick, directory / frame_name(frame_state.frame_idx, frame_format))
 
-            if self.config.debug.show_progress:
-                iterator = tqdm(iterator, total=len(frame_data), desc="Rendering frames")
-            
-            list(iterator)
+    def _render_sequential(self, frames: List[FrameState]):
+        progress = self.events.progress('render', len(frames), "Generating frames")
+        progress.set('workers', 1)
+        for frame_state in frames:
+            progress.update(busy=self._render_timeline_frame(frame_state))
+        progress.close()
+    
+    def _render_parallel(self, frames: List[FrameState]):
+        plan = plan_memory(self.config, self.assets, parallel=True, frame_size=self.renderer.frame_size)
+        self.events.log(f"Parallel Processing w/ {plan.workers} Workers...")
+        if plan.budget_mb:
+            self.events.log(f"Memory plan: {plan.describe()}")
+
+        progress = self.events.progress('render', len(frames), "Rendering frames")
+        progress.set('workers', plan.workers)
+        self.renderer  # Build once here so workers inherit it
+        with Pool(plan.workers, initializer=_init_frame_worker, initargs=(self,)) as pool:
+            for busy in pool.imap(_render_worker_frame, frames, chunksize=4):
+                progress.update(busy=busy)
+        progress.close()
 
     # Pre-compute all animation state transitions
-    def _precompute_states(self) -> list:
-        state = AnimationState(self.config)
-        dt = 1.0 / self.config.output.fps
-        frame_data = []
-
-        for i in range(self.analyzer.frames):
-            time = i / self.config.output.fps
-
-            # Get audio features
-            talking = self.analyzer.is_talking(i)
-            change_point = self.analyzer.is_change_point(i)
-            energy = self.analyzer.get_energy(i)
-            emphasis = self.analyzer.has_emphasis(i)
-
-            # Update state
-            state.update_mouth(talking, change_point, energy, dt)
-            state.update_blink(dt)
-            state.update_eye_dart(dt)
-            state.update_eyebrows(emphasis, dt)
-
-            # Store frame data
-            frame_data.append({
-                'frame_idx': i,
-                'time': time,
-                'dt': dt,
-                'talking': talking,
-                'mouth': state.current_mouth,
-                'blinking': state.blinking,
-                'eyebrow_raised': state.eyebrow_raised,
-                'eye_dart_active': state.eye_dart_active,
-                'eye_dart_progress': state.eye_dart_progress,
-                'eye_dart_target': state.eye_dart_target,
-            })
-        
-        return frame_data
-    
-    # Render frame from pre-computed animation frame data
-    def _render_frame_data(self, data: Dict):
-        # Reconstruct Minimal State
-        state = AnimationState(self.config)
-        state.current_mouth = data['mouth']
-        state.blinking = data['blinking']
-        state.eyebrow_raised = data['eyebrow_raised']
-        state.eye_dart_active = data['eye_dart_active']
-        state.eye_dart_progress = data['eye_dart_progress']
-        state.eye_dart_target = data['eye_dart_target']
-
-        # Render frame
-        frame = self.renderer.render_frame(
-            state,
-            data['time'],
-            data['talking'],
-            data['dt']
-        )
-
-        # Save frame
-        output_path = Path(self.config.performance.frames_directory) / f"frame_{data['frame_idx']:04d}.png"
-        frame.save(output_path)
+    def _build_timeline(self) -> List[FrameState]:
+        with self.events.stage('timeline'):
+            return list(self._iter_timeline())
+
+    # The state pass, one frame at a time
+    def _iter_timeline(self) -> Iterator[FrameState]:
+        return iter_timeline(self.analyzer, self.config)
     
-    # Generate a single frame
-    def _generate_frame(self, frame_idx: int, state: AnimationState, dt: float):
-        time = frame_idx / self.config.output.fps
-
-        # Get audio features
-        talking = self.analyzer.is_talking(frame_idx)
-        change_point = self.analyzer.is_change_point(frame_idx)
-        energy = self.analyzer.get_energy(frame_idx)
-        emphasis = self.analyzer.has_emphasis(frame_idx)
-
-        # Update animation state
-        state.update_mouth(talking, change_point, energy, dt)
-        state.update_blink(dt)
-        state.update_eye_dart(dt)
-        state.update_eyebrows(emphasis, dt)
-
-        # Render frame
-        frame = self.renderer.render_frame(state, time, talking, dt)
-        
-        # Save frame
-        output_path = Path(self.config.performance.frames_directory) / \
-                     f"frame_{frame_idx:04d}.png"
-        frame.save(output_path)
+    # Render and save one timeline frame, return the seconds it took.
+    # Frames are drawn over the previous one; a frame that looks exactly like
+    # it reuses its file instead of being written again.
+    def _render_timeline_frame(self, frame_state: FrameState) -> float:
+        start = time.perf_counter()
+        frame, dirty = self.renderer.draw(frame_state)
+
+        performance = self.config.performance
+        output_path = Path(performance.frames_directory) / frame_name(frame_state.frame_idx, performance.frame_format)
+        if dirty or self._last_frame_file is None:
+            # Never write through a link to another frame's file
+            output_path.unlink(missing_ok=True)
+            save_frame(frame, output_path, performance)
+        else:
+            _link_frame(self._last_frame_file, output_path)
+        self._last_frame_file = output_path
+        return time.perf_counter() - start
     
     # Compile Video
     def _compile_video(self):
-        if self.config.debug.verbose:
-            print("Compiling Video...")
+        self.events.log("Compiling Video...")
         
         # Check if ffmpeg is available
-        try:
-            subprocess.run(['ffmpeg', '-version'],
-                         capture_output=True, check=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            print("ERROR: FFmpeg not found. Please install FFmpeg.")
-            print(f"Frames saved to: {self.config.performance.frames_directory}")
+        if not VideoEncoder.available():
+            self.events.error("FFmpeg not found. Please install FFmpeg.")
+            self.events.info(f"Frames saved to: {self.config.performance.frames_directory}")
             return
         
-        # Build ffmpeg command
-        cmd = [
-            'ffmpeg',
-            '-y',  # Overwrite output
-            '-framerate', str(self.config.output.fps),
-            '-i', f'{self.config.performance.frames_directory}/frame_%04d.png',
-            '-i', self.config.audio_file,
-            '-c:v', self.config.output.video_codec,
-            '-preset', self.config.output.video_preset,
-            '-b:v', self.config.output.video_bitrate,
-            '-c:a', 'aac',
-            '-b:a', self.config.output.audio_bitrate,
-            '-pix_fmt', 'yuv420p',
-            '-shortest',  # Match shortest stream
-            self.config.output.video_file
-        ]
-        
+        encoder = self._encoder()
         try:
-            result = subprocess.run(cmd, check=True, capture_output=True)
-            print(f"✓ Video saved to: {self.config.output.video_file}")
+            encoder.encode_frames(self.config.performance.frames_directory, self.analyzer.frames, self.renderer.frame_size)
+            for target in encoder.targets:
+                self.events.output(target.file)
         except subprocess.CalledProcessError as e:
-            print("ERROR: FFmpeg failed")
-            if self.config.debug.verbose:
-                print(e.stderr.decode())
-            print(f"Frames saved to: {self.config.performance.frames_directory}")
\ No newline at end of file
+            self.events.error("FFmpeg failed")
+            self.events.log(e.stderr.decode())
+            self.events.info(f"Frames saved to: {self.config.performance.frames_directory}")
+
+# Hard link `path` to an existing frame file (a copy where links are not supported)
+def _link_frame(source: Path, path: Path):
+    path.unlink(missing_ok=True)
+    try:
+        os.link(source, path)
+    except OSError:
+        shutil.copyfile(source, path)
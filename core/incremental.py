@@ -0,0 +1,163 @@
+import json
+import random
+import shutil
+import hashlib
+import subprocess
+import numpy as np
+from pathlib import Path
+from dataclasses import asdict
+from typing import List, Optional, Tuple, TYPE_CHECKING
+
+from core.animation_state import FrameState
+from core.encoder import VideoEncoder
+from core.watch import asset_paths
+
+if TYPE_CHECKING:
+    from core.audio_analyzer import AudioAnalyzer
+    from core.generator import AnimationGenerator
+
+MANIFEST = 'manifest.json'
+FEATURES = 'features.npz'
+
+# Per-frame (rms, f0) rounded so re-decoding the same audio compares equal
+def frame_features(analyzer: 'AudioAnalyzer') -> np.ndarray:
+    return np.stack([np.round(analyzer.rms, 4), np.round(analyzer.f0, 1)], axis=1).astype(np.float32)
+
+# Frame spans [start, end) of `new` that differ from `old`
+def changed_spans(old: np.ndarray, new: np.ndarray) -> List[Tuple[int, int]]:
+    if len(old) == len(new):
+        # Same length: compare in place, group differing frames into runs
+        diff = np.any(old != new, axis=1)
+        edges = np.flatnonzero(np.diff(np.concatenate([[0], diff.astype(np.int8), [0]])))
+        return [(int(a), int(b)) for a, b in zip(edges[::2], edges[1::2])]
+
+    # Length changed: everything between the common prefix and suffix
+    limit = min(len(old), len(new))
+    prefix = 0
+    while prefix < limit and np.array_equal(old[prefix], new[prefix]):
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and np.array_equal(old[-1 - suffix], new[-1 - suffix]):
+        suffix += 1
+    return [(prefix, len(new) - suffix)]
+
+# Reuse the previous run's encoded segments wherever the frames are unchanged.
+# Segments are content addressed: the file name hashes the render keys of its
+# frames plus everything else that decides its pixels, so any unchanged
+# segment (even one that moved) is found on disk and not re-encoded.
+class IncrementalBuild:
+    def __init__(self, generator: 'AnimationGenerator'):
+        self.generator = generator
+        self.config = generator.config
+        self.cache_dir = Path(self.config.performance.cache_directory) / Path(self.config.output.video_file).stem
+        self.segment_frames = max(1, int(self.config.performance.segment_seconds * self.config.output.fps))
+
+    def run(self):
+        if not VideoEncoder.available():
+            self.generator.events.warning("FFmpeg not found, incremental mode disabled")
+            self.config.performance.incremental = False
+            self.generator.generate()
+            return
+
+        events = self.generator.events
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        previous = self._load_manifest()
+
+        # Keep the previous run's seed so unchanged audio gives unchanged frames
+        if self.config.animation.seed is None:
+            self.config.animation.seed = previous['seed'] if previous else random.randrange(2 ** 31)
+
+        features = frame_features(self.generator.analyzer)
+        old_features = self._load_features() if previous else None
+        if old_features is not None:
+            spans = changed_spans(old_features, features)
+            fps = self.config.output.fps
+            described = ', '.join(f"{a / fps:.2f}-{b / fps:.2f}s" for a, b in spans) or "none"
+            events.log(f"Changed audio spans: {described}")
+
+        timeline = self.generator._build_timeline()
+        encoder = self.generator._encoder()
+        context = self._context_key(encoder)
+
+        # Segment files and the ones that must be rendered
+        segments, missing = [], []
+        for start in range(0, len(timeline), self.segment_frames):
+            frames = timeline[start:start + self.segment_frames]
+            digest = _segment_digest(context, frames, encoder.segment_keyframes(start, len(frames)))
+            files = [str(self.cache_dir / f'{digest}_{t}.mp4') for t in range(len(encoder.targets))]
+            segments.append(files)
+            if not all(Path(f).exists() for f in files):
+                missing.append((start, frames, files))
+
+        events.info(f"Incremental: re-rendering {len(missing)}/{len(segments)} segment(s)")
+        events.cache('segments', len(segments) - len(missing), len(segments))
+
+        frames_dir = Path(self.config.performance.frames_directory)
+        frames_dir.mkdir(parents=True, exist_ok=True)
+        self.generator._render_frames([f for _, frames, _ in missing for f in frames])
+
+        try:
+            size = self.generator.assets.base.size
+            with events.stage('encode'):
+                for start, frames, files in missing:
+                    encoder.encode_segment(str(frames_dir), start, len(frames), files, size)
+                encoder.concat_segments(segments, str(self.cache_dir))
+        except subprocess.CalledProcessError as e:
+            events.error("FFmpeg failed")
+            events.log(e.stderr.decode())
+            return
+
+        for target in encoder.targets:
+            events.output(target.file)
+
+        self._save(features, segments)
+        if self.config.performance.cleanup_frames and not self.config.debug.keep_frames:
+            shutil.rmtree(frames_dir, ignore_errors=True)
+
+    # Everything besides the render keys that decides a segment's pixels and encoding
+    def _context_key(self, encoder: VideoEncoder) -> str:
+        assets = {}
+        for layer, path in asset_paths(self.config).items():
+            stat = path.stat() if path.exists() else None
+            assets[layer] = [str(path), stat.st_mtime_ns, stat.st_size] if stat else None
+        return json.dumps({
+            'assets': assets,
+            'targets': [asdict(t) for t in encoder.targets],
+            'fps': self.config.output.fps,
+        }, sort_keys=True, default=str)
+
+    def _load_manifest(self) -> Optional[dict]:
+        path = self.cache_dir / MANIFEST
+        if not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def _load_features(self) -> Optional[np.ndarray]:
+        path = self.cache_dir / FEATURES
+        if not path.exists():
+            return None
+        with np.load(path) as data:
+            return data['features']
+
+    # Record this run and drop segments it no longer uses
+    def _save(self, features: np.ndarray, segments: List[List[str]]):
+        np.savez(self.cache_dir / FEATURES, features=features)
+        (self.cache_dir / MANIFEST).write_text(json.dumps({
+            'seed': self.config.animation.seed,
+            'segments': segments,
+        }))
+
+        keep = {Path(f).name for files in segments for f in files}
+        for path in self.cache_dir.glob('*.mp4'):
+            if path.name not in keep:
+                path.unlink()
+
+def _segment_digest(context: str, frames: List[FrameState], keyframes: List[float]) -> str:
+    digest = hashlib.sha1(context.encode())
+    for frame_state in frames:
+        digest.update(repr(frame_state.render_key()).encode())
+    digest.update(repr(keyframes).encode())
+    return digest.hexdigest()[:20]
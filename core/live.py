@@ -0,0 +1,268 @@
+import sys
+import stat
+import time
+import math
+import bisect
+import numpy as np
+from pathlib import Path
+from itertools import count
+from collections import deque
+from dataclasses import dataclass, field
+from typing import BinaryIO, Iterable, Iterator, List, Optional, TYPE_CHECKING
+
+from core.asset_manager import AssetManager
+from core.animation_state import AnimationState
+from renderers.frame_renderer import FrameRenderer
+
+if TYPE_CHECKING:
+    from utils import Config
+
+# Analysis window, the librosa default for rms and yin
+FRAME_LENGTH = 2048
+
+# Raw s16le PCM from stdin ('-') or a named pipe
+class PCMSource:
+    def __init__(self, path: str, sample_rate: int, channels: int):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.channels = channels
+
+    # One block per size, until the stream ends
+    def blocks(self, sizes: Iterable[int]) -> Iterator[np.ndarray]:
+        stream = sys.stdin.buffer if self.path == '-' else open(self.path, 'rb')
+        try:
+            for size in sizes:
+                block_bytes = size * self.channels * 2
+                data = _read_exact(stream, block_bytes)
+                if len(data) < block_bytes:
+                    return
+                samples = np.frombuffer(data, dtype='<i2').astype(np.float32) / 32768.0
+                yield samples.reshape(-1, self.channels).mean(axis=1)
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+
+# An audio file replayed at real-time speed (local stand-in for a live feed)
+class FileReplaySource:
+    def __init__(self, path: str):
+        import soundfile
+
+        self.path = path
+        self.sample_rate = soundfile.info(path).samplerate
+
+    def blocks(self, sizes: Iterable[int]) -> Iterator[np.ndarray]:
+        import soundfile
+
+        start = time.perf_counter()
+        played = 0
+        with soundfile.SoundFile(self.path) as f:
+            for size in sizes:
+                block = f.read(size, dtype='float32', always_2d=True)
+                if len(block) < size:
+                    return
+                played += size
+
+                # A block is available once it would have finished playing
+                wait = start + played / self.sample_rate - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+                yield block.mean(axis=1)
+
+# '-' and named pipes carry raw PCM, anything else is replayed from disk
+def open_source(spec: str, config: 'Config'):
+    if spec == '-' or stat.S_ISFIFO(Path(spec).stat().st_mode):
+        return PCMSource(spec, config.live.sample_rate, config.live.channels)
+    return FileReplaySource(spec)
+
+# Percentiles over the last `size` values
+class RollingPercentile:
+    def __init__(self, size: int):
+        self.values = deque(maxlen=max(1, size))
+        self.ordered: List[float] = []
+
+    def add(self, value: float):
+        if len(self.values) == self.values.maxlen:
+            del self.ordered[bisect.bisect_left(self.ordered, self.values[0])]
+        self.values.append(value)
+        bisect.insort(self.ordered, value)
+
+    # Linear interpolation, like np.percentile
+    def percentile(self, q: float) -> float:
+        position = q / 100 * (len(self.ordered) - 1)
+        lower = int(position)
+        upper = min(lower + 1, len(self.ordered) - 1)
+        return self.ordered[lower] + (self.ordered[upper] - self.ordered[lower]) * (position - lower)
+
+# Causal version of AudioAnalyzer: one frame's block of samples in, one frame's features out.
+# Whole-file statistics become running ones: rms is normalized by the loudest
+# frame so far and percentile thresholds cover the last live.window_seconds.
+class LiveAnalyzer:
+    def __init__(self, config: 'Config', sample_rate: int):
+        self.config = config
+        self.sample_rate = sample_rate
+        self.fps = config.output.fps
+        self.hop_length = math.ceil(sample_rate / self.fps)
+
+        window = int(config.live.window_seconds * config.output.fps)
+        self.energy_deltas = RollingPercentile(window)
+        self.pitch_deltas = RollingPercentile(window)
+
+        self.buffer = np.zeros(max(FRAME_LENGTH, self.hop_length), dtype=np.float32)
+        self.peak = 0.0
+        self.energy = None
+        self.f0 = None
+
+        # Exponential smoothing stands in for the centered gaussian
+        self.pitch_alpha = 1.0 / (1.0 + config.audio.pitch_smoothing)
+
+        # Import and compile the pitch tracker now, not on the first live block
+        self._pitch(self.buffer[-FRAME_LENGTH:])
+
+    # Samples in each frame's block. Frame boundaries are rounded rather than truncated,
+    # so blocks average exactly sample_rate / fps and the face keeps pace with the audio.
+    def block_sizes(self) -> Iterator[int]:
+        for i in count():
+            yield round((i + 1) * self.sample_rate / self.fps) - round(i * self.sample_rate / self.fps)
+
+    # Features for the next frame: (talking, change_point, energy, emphasis)
+    def push(self, block: np.ndarray):
+        self.buffer = np.concatenate([self.buffer[len(block):], block])
+        window = self.buffer[-FRAME_LENGTH:]
+
+        # Loudness, normalized by the running peak
+        rms = float(np.sqrt(np.mean(window ** 2)))
+        self.peak = max(self.peak, rms)
+        energy = rms / self.peak if self.peak > 0 else 0.0
+
+        f0 = self._pitch(window)
+        if self.f0 is not None:
+            f0 = self.f0 + (f0 - self.f0) * self.pitch_alpha
+
+        energy_delta = energy - self.energy if self.energy is not None else 0.0
+        pitch_delta = abs(f0 - self.f0) if self.f0 is not None else 0.0
+        self.energy, self.f0 = energy, f0
+        self.energy_deltas.add(energy_delta)
+        self.pitch_deltas.add(pitch_delta)
+
+        talking = energy > self.config.audio.talk_threshold
+        change_point = (
+            energy_delta > self.config.audio.mouth_change_energy or
+            pitch_delta > self.pitch_deltas.percentile(90)
+        )
+        emphasis = (
+            pitch_delta > self.pitch_deltas.percentile(self.config.audio.emphasis_pitch_threshold) or
+            energy_delta > self.energy_deltas.percentile(self.config.audio.emphasis_energy_threshold)
+        )
+        return talking, change_point, energy, emphasis
+
+    # Pitch of one analysis window
+    def _pitch(self, window: np.ndarray) -> float:
+        import librosa
+
+        f0 = librosa.yin(
+            window,
+            fmin=self.config.audio.pitch_min,
+            fmax=self.config.audio.pitch_max,
+            sr=self.sample_rate,
+            frame_length=FRAME_LENGTH,
+            hop_length=FRAME_LENGTH,
+            center=False
+        )
+        return float(np.nan_to_num(f0[-1]))
+
+@dataclass
+class LiveStats:
+    frames: int = 0
+    dropped: int = 0
+    latencies: List[float] = field(default_factory=list)
+
+    def summary(self) -> str:
+        if not self.frames:
+            return "no frames"
+        latencies = np.array(self.latencies) * 1000
+        return (
+            f"{self.frames} frames, {self.dropped} dropped ({self.dropped / self.frames:.1%}), "
+            f"latency avg {latencies.mean():.0f}ms / p95 {np.percentile(latencies, 95):.0f}ms / "
+            f"max {latencies.max():.0f}ms"
+        )
+
+# Drive the face from a live source and write raw rgb24 frames at the output fps.
+# Frames more than live.latency_ms behind schedule skip rendering and repeat the
+# previous image, so the stream keeps its rate and the state keeps advancing.
+class LiveSession:
+    def __init__(self, config: 'Config', source, output: str = '-'):
+        self.config = config
+        self.source = source
+        self.output = output
+        self.assets = AssetManager(config)
+        self.renderer = FrameRenderer(self.assets, config)
+        self.stats = LiveStats()
+
+    @property
+    def frame_size(self):
+        return self.assets.base.size
+
+    def run(self) -> LiveStats:
+        fps = self.config.output.fps
+        budget = self.config.live.latency_ms / 1000
+        analyzer = LiveAnalyzer(self.config, self.source.sample_rate)
+        state = AnimationState(self.config)
+
+        # Opening a pipe blocks until the reader attaches
+        stream = self._open_output()
+        sample_rate = self.source.sample_rate
+        start = None
+        consumed = 0
+        image: Optional[bytes] = None
+        try:
+            for i, block in enumerate(self.source.blocks(analyzer.block_sizes())):
+                # Audio clock: when the source's first sample started playing
+                consumed += len(block)
+                if start is None:
+                    start = time.perf_counter() - consumed / sample_rate
+
+                talking, change_point, energy, emphasis = analyzer.push(block)
+                t = i / fps
+                state.advance(t, talking, change_point, energy, emphasis, 1.0 / fps)
+                frame_state = state.snapshot(i, t, talking)
+
+                # Due once this frame's audio has played
+                due = start + consumed / sample_rate
+                if image is None or time.perf_counter() - due <= budget:
+                    image = self.renderer.render_frame(frame_state).convert('RGB').tobytes()
+                else:
+                    self.stats.dropped += 1
+
+                # Never run ahead of the audio
+                wait = due - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+                stream.write(image)
+                stream.flush()
+
+                self.stats.frames += 1
+                self.stats.latencies.append(time.perf_counter() - due)
+        except (BrokenPipeError, KeyboardInterrupt):
+            pass
+        finally:
+            if stream is not sys.stdout.buffer:
+                try:
+                    stream.close()
+                except BrokenPipeError:
+                    pass
+        return self.stats
+
+    def _open_output(self) -> BinaryIO:
+        if self.output == '-':
+            return sys.stdout.buffer
+        return open(self.output, 'wb')
+
+def _read_exact(stream: BinaryIO, size: int) -> bytes:
+    chunks = []
+    while size > 0:
+        chunk = stream.read(size)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
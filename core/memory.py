@@ -0,0 +1,116 @@
+import os
+from dataclasses import dataclass
+from multiprocessing import cpu_count
+from typing import List, Optional, Tuple, Union, TYPE_CHECKING
+
+from renderers.yuv import raw_frame_bytes
+
+if TYPE_CHECKING:
+    from utils import Config
+    from core.asset_manager import AssetManager
+
+MB = 1024 * 1024
+
+# Analysis window of rms and yin (the librosa default)
+FRAME_LENGTH = 2048
+
+# Peak bytes yin holds per analysis frame and window sample (measured ~20)
+YIN_BYTES_PER_SAMPLE = 24
+
+# Interpreter, numpy and PIL in a forked worker that are not shared with the parent
+WORKER_OVERHEAD_MB = 40
+
+# Raw bytes a render batch aims for, and its frame limit
+BATCH_MB = 64
+MAX_BATCH_FRAMES = 64
+
+# Shares of the free budget
+WORKER_SHARE = 0.6
+QUEUE_SHARE = 0.25
+CACHE_SHARE = 0.15
+ANALYSIS_SHARE = 0.5
+
+# Resident memory of this process in MB
+def current_rss_mb() -> float:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / MB
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+# Analysis frames per pitch/loudness block under the budget, None for the whole file at once
+def analysis_block_frames(config: 'Config') -> Optional[int]:
+    budget = config.performance.max_memory_mb
+    if not budget:
+        return None
+    free = max(budget - current_rss_mb(), 0) * ANALYSIS_SHARE
+    return max(config.output.fps, int(free * MB / (FRAME_LENGTH * YIN_BYTES_PER_SAMPLE)))
+
+# Decoded bytes of every image a worker holds
+def assets_bytes(assets: 'AssetManager') -> int:
+    images = [assets.base, assets.eyes_open, assets.eyes_closed, *assets.mouths.values()]
+    if assets.has_eyebrows:
+        images += [assets.eyebrows_normal, assets.eyebrows_raised]
+    images += [sprite for sprite, _, _ in assets.eye_sprites.values()]
+    images += list({id(sprite): sprite for face in assets.faces.values() for sprite, _, _ in face}.values())
+    return sum(image.width * image.height * len(image.getbands()) for image in images)
+
+@dataclass
+class MemoryPlan:
+    workers: int
+    queue_frames: int
+    cache_frames: int
+    batch_frames: int = 1
+    budget_mb: Optional[float] = None
+    worker_mb: float = 0.0
+    frame_mb: float = 0.0
+    fits: bool = True
+
+    def describe(self) -> str:
+        text = (f"{self.workers} worker(s), {self.queue_frames} frames in flight "
+                f"in batches of {self.batch_frames}, {self.cache_frames} cached frames")
+        if self.budget_mb:
+            text += (f" (budget {self.budget_mb:.0f} MB: {self.worker_mb:.0f} MB per worker, "
+                     f"{self.frame_mb:.1f} MB per frame)")
+        return text
+
+# Worker count, frames in flight, batch size and composite cache size for a render.
+# Without performance.max_memory_mb the configured values are used as is;
+# with it, each is sized from measured per-item footprints so that the
+# bounded queues hold the job under budget instead of running out of memory.
+# A scene passes every character's assets and its canvas size.
+def plan_memory(
+    config: 'Config',
+    assets: Union['AssetManager', List['AssetManager']],
+    parallel: bool,
+    frame_size: Optional[Tuple[int, int]] = None
+) -> MemoryPlan:
+    performance = config.performance
+    managers = assets if isinstance(assets, list) else [assets]
+    width, height = frame_size or managers[0].base.size
+    frame_bytes = raw_frame_bytes(width, height, performance.stream_format)
+    frame_mb = frame_bytes / MB
+
+    workers = (performance.num_workers or max(1, cpu_count() - 1)) if parallel else 1
+    batch_frames = performance.batch_frames or min(MAX_BATCH_FRAMES, max(1, BATCH_MB * MB // frame_bytes))
+    queue_frames = performance.queue_frames or 2 * workers * batch_frames
+    cache_frames = performance.cache_frames
+
+    budget = performance.max_memory_mb
+    if not budget:
+        return MemoryPlan(workers, queue_frames, cache_frames, batch_frames)
+    # Assets, plus the RGBA composite, its RGB copy and the bytes sent back
+    worker_mb = (WORKER_OVERHEAD_MB + sum(assets_bytes(m) for m in managers) / MB +
+                 width * height * 11 / MB)
+    free = budget - current_rss_mb()
+    fits = free >= (worker_mb if parallel else 0) + 2 * frame_mb
+
+    if parallel:
+        workers = max(1, min(workers, int(free * WORKER_SHARE / worker_mb)))
+        queue_frames = performance.queue_frames or 2 * workers * batch_frames
+    # Every frame in flight exists as a pickled result and as queued bytes
+    queue_frames = max(1, min(queue_frames, int(free * QUEUE_SHARE / (2 * frame_mb))))
+    batch_frames = min(batch_frames, queue_frames)
+    cache_frames = max(0, min(cache_frames, int(free * CACHE_SHARE / frame_mb)))
+    return MemoryPlan(workers, queue_frames, cache_frames, batch_frames, budget, worker_mb, frame_mb, fits)
@@ -0,0 +1,205 @@
+import time
+import queue
+import threading
+import subprocess
+from itertools import islice
+from collections import deque
+from multiprocessing import Pool
+from typing import Iterator, List, Optional, Tuple, TYPE_CHECKING
+
+from core.animation_state import FrameState
+from core.memory import plan_memory
+from core.scheduler import CALIBRATION_FRAMES, WorkerScheduler, measure_encode
+from core.timeline import hold_frames
+from renderers.batch_renderer import BatchRenderer, PatchGroup
+from renderers.frame_renderer import FrameRenderer
+
+if TYPE_CHECKING:
+    from core.generator import AnimationGenerator
+
+# Batch renderer of a pool worker, set once by the initializer so tasks only carry FrameStates
+_worker_renderer: Optional[BatchRenderer] = None
+
+def _init_worker(renderer: FrameRenderer, pixel_format: str, cache_frames: int):
+    global _worker_renderer
+    _worker_renderer = BatchRenderer(renderer, pixel_format, cache_frames)
+
+def _render_batch(frames: List[FrameState]) -> Tuple[List[PatchGroup], int, float]:
+    return _render(_worker_renderer, frames)
+
+# A batch's patches in the stream's pixel format, the frames that reused an earlier
+# composite and the seconds it took. Converting here means each unique frame is
+# converted once and ffmpeg gets frames it does not convert again; only the patches
+# travel back from a worker, and the main process copies them into the frames.
+def _render(renderer: BatchRenderer, frames: List[FrameState]) -> Tuple[List[PatchGroup], int, float]:
+    start = time.perf_counter()
+    groups, hits = renderer.patches(frames)
+    return groups, hits, time.perf_counter() - start
+
+# Consecutive slices of the timeline
+def _batches(timeline: Iterator[FrameState], size: int) -> Iterator[List[FrameState]]:
+    while True:
+        batch = list(islice(timeline, size))
+        if not batch:
+            return
+        yield batch
+
+# State pass, rendering and encoding run at the same time: the state pass feeds
+# render workers with batches of frames, a bounded number of frames in flight,
+# finished blocks go through a bounded queue to a thread that writes them to
+# ffmpeg's stdin, and ffmpeg encodes while the next batches render. No frames
+# touch the disk.
+class FramePipeline:
+    def __init__(self, generator: 'AnimationGenerator'):
+        self.generator = generator
+        self.config = generator.config
+
+    def run(self):
+        config = self.config
+        events = self.generator.events
+        frames = self.generator.analyzer.frames
+        renderer = self.generator.renderer
+        size = renderer.frame_size
+
+        parallel = config.performance.parallel and frames > 100
+        plan = plan_memory(config, self.generator.assets, parallel, size)
+        if not plan.fits:
+            events.warning(f"performance.max_memory_mb ({plan.budget_mb:.0f} MB) is below what one "
+                           f"render worker needs, running with the minimum")
+
+        events.log(f"Audio: {config.audio_file}")
+        events.log(f"Duration: {self.generator.analyzer.duration:.2f}s")
+        events.log(f"Frames: {frames} at {config.output.fps} FPS (streamed to ffmpeg)")
+        events.log(f"Memory plan: {plan.describe()}")
+
+        encoder = self.generator._encoder()
+        pixel_format = config.performance.stream_format
+
+        # Only animation ticks are composited and sent; ffmpeg holds them
+        hold = hold_frames(config)
+        timeline = islice(self.generator._iter_timeline(), 0, None, hold)
+        frames = -(-frames // hold)
+
+        batches = _batches(timeline, plan.batch_frames)
+        batch_renderer = BatchRenderer(renderer, pixel_format, plan.cache_frames)
+
+        # Time the first frames to split the cores between renderers and the encoder
+        scheduler = None
+        calibration = None
+        if parallel and config.performance.adaptive_workers:
+            scheduler = WorkerScheduler(plan.workers)
+            first = list(islice(timeline, max(plan.batch_frames, CALIBRATION_FRAMES)))
+            calibration = (len(first), _render(batch_renderer, first))
+            groups, _, busy = calibration[1]
+            block = batch_renderer.assemble(len(first), groups)
+            images = [row.tobytes() for row in block[:CALIBRATION_FRAMES]]
+            try:
+                encode_seconds = measure_encode(encoder, images, *size, pixel_format)
+            except subprocess.CalledProcessError as e:
+                events.error("FFmpeg failed")
+                events.log(e.stderr.decode())
+                return
+            split = scheduler.plan(busy / len(first), encode_seconds)
+            encoder.threads = split.encoder_threads
+            events.log(f"Schedule: {split.describe()}")
+
+        process = encoder.open_stream(*size, hold=hold, pixel_format=pixel_format)
+
+        # Writer thread: keeps ffmpeg fed while the main thread schedules renders
+        queue_blocks = max(1, plan.queue_frames // plan.batch_frames)
+        written = queue.Queue(maxsize=queue_blocks)
+        errors = []
+        encoded = [0]
+        writer = threading.Thread(
+            target=_write_frames, args=(written, process.stdin, errors, encoded), daemon=True
+        )
+        writer.start()
+
+        progress = events.progress('render', frames, "Rendering frames")
+        progress.set('workers', plan.workers)
+        progress.set('batch_frames', plan.batch_frames)
+        if scheduler is not None:
+            progress.set('encoder_threads', encoder.threads)
+
+        # Batches in order as (frames, pending result or (patches, hits, seconds))
+        pending = deque()
+        hits = [0]
+
+        # Assemble the oldest batch and hand it to the writer; encoder and queue gauges ride along
+        def emit():
+            count, result = pending.popleft()
+            groups, batch_hits, busy = result if isinstance(result, tuple) else result.get()
+            hits[0] += batch_hits
+            block = batch_renderer.assemble(count, groups)
+
+            if errors:
+                raise RuntimeError("FFmpeg stopped reading frames") from errors[0]
+            written.put(block)
+            progress.set('encoded', encoded[0])
+            progress.set('queue_depth', written.qsize())
+            progress.set('in_flight', len(pending))
+            if scheduler is not None:
+                progress.set('active_workers', scheduler.observe(written.qsize(), queue_blocks, count))
+            progress.update(len(block), busy=busy)
+
+        # Batches in flight: with the scheduler, one per active renderer, so the
+        # pool's other processes stay idle and their cores go to the encoder
+        def limit() -> int:
+            if scheduler is None:
+                return queue_blocks
+            return max(1, min(queue_blocks, scheduler.active))
+
+        try:
+            with events.stage('render'):
+                if calibration is not None:
+                    pending.append(calibration)
+                if parallel:
+                    initargs = (renderer, pixel_format, plan.cache_frames)
+                    with Pool(plan.workers, initializer=_init_worker, initargs=initargs) as pool:
+                        for batch in batches:
+                            pending.append((len(batch), pool.apply_async(_render_batch, (batch,))))
+                            while len(pending) >= limit():
+                                emit()
+                        while pending:
+                            emit()
+                else:
+                    for batch in batches:
+                        pending.append((len(batch), _render(batch_renderer, batch)))
+                        emit()
+        except RuntimeError:
+            # ffmpeg exited early: stop rendering and report why below
+            if not errors:
+                raise
+        finally:
+            written.put(None)
+            writer.join()
+            progress.set('encoded', encoded[0])
+            progress.close()
+
+        try:
+            with events.stage('encode'):
+                encoder.finish_stream(process)
+        except subprocess.CalledProcessError as e:
+            events.error("FFmpeg failed")
+            events.log(e.stderr.decode())
+            return
+        if errors:
+            events.error(f"FFmpeg stopped reading frames: {errors[0]}")
+            return
+
+        events.cache('composites', hits[0], frames)
+        for target in encoder.targets:
+            events.output(target.file)
+
+def _write_frames(written: queue.Queue, stream, errors: list, encoded: list):
+    while True:
+        block = written.get()
+        if block is None:
+            return
+        if errors:
+            continue
+        try:
+            stream.write(block)
+            encoded[0] += len(block)
+        except (BrokenPipeError, OSError) as e:
+            errors.append(e)
@@ -0,0 +1,272 @@
+import copy
+import tempfile
+import subprocess
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from utils import Config, CharacterConfig
+from core.audio_analyzer import AudioAnalyzer
+from core.asset_manager import AssetManager
+from core.animation_state import AnimationState, FrameState
+from core.encoder import VideoEncoder
+from core.generator import AnimationGenerator
+from core.timeline import TimelineIndex, _step, hold_frames, held_frame
+from renderers.frame_renderer import Box, FrameRenderer
+
+# Recent composites kept per character; a silent character often looks the same for a while
+CHARACTER_CACHE_FRAMES = 4
+
+# One output frame of a scene: every character's state
+@dataclass
+class SceneFrame:
+    frame_idx: int
+    time: float
+    characters: Tuple[FrameState, ...]
+
+    def render_key(self) -> tuple:
+        return tuple(state.render_key() for state in self.characters)
+
+# A character's own config: its audio, assets and random channels, the rest shared
+def character_config(config: Config, character: CharacterConfig, index: int) -> Config:
+    own = copy.deepcopy(config)
+    own.scene.characters = []
+    own.audio_file = character.audio or config.audio_file
+    if character.assets:
+        own.assets.directory = character.assets
+    # Characters must not blink in sync
+    if config.animation.seed is not None:
+        own.animation.seed = f"{config.animation.seed}:{index}"
+    return own
+
+def character_name(character: CharacterConfig, index: int) -> str:
+    return character.name or f"character_{index}"
+
+# Analyze every character's track. Files are decoded once: a file split into
+# channels is loaded with all of them, and characters sharing a track share its analysis.
+def analyze_tracks(configs: List[Config], characters: List[CharacterConfig]) -> List[AudioAnalyzer]:
+    import librosa
+
+    decoded: Dict[str, tuple] = {}
+    analyzers: Dict[Tuple[str, Optional[int]], AudioAnalyzer] = {}
+    for config, character in zip(configs, characters):
+        key = (config.audio_file, character.channel)
+        if key in analyzers:
+            continue
+
+        if character.channel is None:
+            analyzers[key] = AudioAnalyzer(config.audio_file, config)
+            continue
+
+        if config.audio_file not in decoded:
+            decoded[config.audio_file] = librosa.load(config.audio_file, sr=config.audio.sample_rate, mono=False)
+        audio, sample_rate = decoded[config.audio_file]
+        channels = 1 if audio.ndim == 1 else audio.shape[0]
+        if character.channel >= channels:
+            raise ValueError(f"{config.audio_file} has {channels} channel(s), channel {character.channel} requested")
+        signal = audio if audio.ndim == 1 else audio[character.channel]
+        analyzers[key] = AudioAnalyzer(config.audio_file, config, signal=(signal, sample_rate))
+
+    tracks = [analyzers[(config.audio_file, character.channel)] for config, character in zip(configs, characters)]
+    frames = max(track.frames for track in tracks)
+    return [track.padded(frames) for track in tracks]
+
+# Shared state pass: every character advances on its own track, frame by frame
+def iter_scene_timeline(analyzers: List[AudioAnalyzer], configs: List[Config], config: Config) -> Iterator[SceneFrame]:
+    states = [AnimationState(c) for c in configs]
+    hold = hold_frames(config)
+    fps = config.output.fps
+    for i in range(analyzers[0].frames):
+        if i % hold == 0:
+            tick = SceneFrame(i, i / fps, tuple(
+                _step(state, analyzer, i, fps, hold) for state, analyzer in zip(states, analyzers)
+            ))
+            yield tick
+        else:
+            yield held_frame(tick, i, fps)
+
+# TimelineIndex over a scene: checkpoints hold every character's state
+class SceneTimelineIndex(TimelineIndex):
+    def __init__(self, analyzers: List[AudioAnalyzer], configs: List[Config], config: Config, interval: int = 240):
+        self.analyzers = analyzers
+        self.configs = configs
+        super().__init__(analyzers[0], config, interval)
+
+    def _new_state(self) -> List[AnimationState]:
+        return [AnimationState(c) for c in self.configs]
+
+    def _checkpoint(self, states: List[AnimationState]) -> list:
+        return [state.checkpoint() for state in states]
+
+    def _restore(self, checkpoints: list) -> List[AnimationState]:
+        states = self._new_state()
+        for state, checkpoint in zip(states, checkpoints):
+            state.restore(checkpoint)
+        return states
+
+    def _advance(self, states: List[AnimationState], i: int) -> SceneFrame:
+        fps = self.config.output.fps
+        return SceneFrame(i, i / fps, tuple(
+            _step(state, analyzer, i, fps, self.hold) for state, analyzer in zip(states, self.analyzers)
+        ))
+
+# Composites every character's frame onto one canvas
+class SceneRenderer:
+    def __init__(self, config: Config, renderers: List[FrameRenderer], positions: List[Tuple[int, int]]):
+        self.config = config
+        self.renderers = renderers
+        self.positions = [tuple(p) for p in positions]
+        self.background = self._background()
+        self._caches = [OrderedDict() for _ in renderers]
+        self._drawn: Optional[Tuple[tuple, Image.Image]] = None
+
+    # Workers start with empty caches
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_caches'] = [OrderedDict() for _ in self.renderers]
+        state['_drawn'] = None
+        return state
+
+    @property
+    def frame_size(self) -> Tuple[int, int]:
+        canvas = self.config.scene.canvas
+        if canvas:
+            return tuple(canvas)
+        # Fit every character, rounded up to even sizes for yuv420p
+        width = max(x + r.frame_size[0] for r, (x, _) in zip(self.renderers, self.positions))
+        height = max(y + r.frame_size[1] for r, (_, y) in zip(self.renderers, self.positions))
+        return (width + width % 2, height + height % 2)
+
+    def render_frame(self, scene_frame: SceneFrame) -> Image.Image:
+        canvas = self.background.copy()
+        for i, state in enumerate(scene_frame.characters):
+            canvas.alpha_composite(self._character(i, state), self.positions[i])
+        return canvas
+
+    # FrameRenderer.draw for a scene: the whole canvas is redrawn, unless the
+    # frame looks exactly like the previous one drawn
+    def draw(self, scene_frame: SceneFrame) -> Tuple[Image.Image, List[Box]]:
+        key = scene_frame.render_key()
+        if self._drawn is not None and self._drawn[0] == key:
+            return self._drawn[1], []
+        canvas = self.render_frame(scene_frame)
+        self._drawn = (key, canvas)
+        return canvas, [(0, 0, *self.frame_size)]
+
+    def _character(self, i: int, state: FrameState) -> Image.Image:
+        cache = self._caches[i]
+        key = state.render_key()
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+        frame = self.renderers[i].render_frame(state)
+        cache[key] = frame
+        if len(cache) > CHARACTER_CACHE_FRAMES:
+            cache.popitem(last=False)
+        return frame
+
+    def _background(self) -> Image.Image:
+        background = self.config.scene.background
+        if Path(background).is_file():
+            return Image.open(background).convert('RGBA').resize(self.frame_size)
+        return Image.new('RGBA', self.frame_size, background)
+
+# Several characters, each driven by its own track, rendered into one video.
+# Analysis, the state pass, compositing and encoding run once for the whole scene,
+# through the same pipeline (or frame files) as a single face.
+class SceneGenerator(AnimationGenerator):
+    def __init__(self, config: Config):
+        self.characters = config.scene.characters
+        self.configs = [character_config(config, c, i) for i, c in enumerate(self.characters)]
+        self.analyzers: List[AudioAnalyzer] = []
+        super().__init__(config)
+
+    # Tracks are padded to one length, so any of them gives frames and duration
+    def _analyze(self) -> AudioAnalyzer:
+        self.analyzers = analyze_tracks(self.configs, self.characters)
+        return self.analyzers[0]
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state['analyzers'] = None
+        return state
+
+    @property
+    def assets(self) -> List[AssetManager]:
+        if self._assets is None:
+            self._assets = [AssetManager(c) for c in self.configs]
+        return self._assets
+
+    @property
+    def renderer(self) -> SceneRenderer:
+        if self._renderer is None:
+            renderers = [FrameRenderer(assets, c) for assets, c in zip(self.assets, self.configs)]
+            self._renderer = SceneRenderer(self.config, renderers, [c.position for c in self.characters])
+        return self._renderer
+
+    def generate(self):
+        performance = self.config.performance
+        if performance.incremental or performance.backend == 'ffmpeg':
+            self.events.warning("Scenes render with the python backend, performance.incremental and backend are ignored")
+
+        for i, (character, analyzer) in enumerate(zip(self.characters, self.analyzers)):
+            source = analyzer.audio_file + (f" channel {character.channel}" if character.channel is not None else "")
+            self.events.log(f"{character_name(character, i)}: {source} at {tuple(character.position)}")
+
+        with self._scene_audio():
+            if self._uses_pipeline():
+                from core.pipeline import FramePipeline
+                FramePipeline(self).run()
+                return
+
+            self._prepare()
+            self._render_frames(self._build_timeline())
+            self._finish()
+
+    def render_at(self, time: float) -> Image.Image:
+        if self._timeline_index is None:
+            self._timeline_index = SceneTimelineIndex(
+                self.analyzers, self.configs, self.config, self.config.performance.checkpoint_interval
+            )
+        index = self._timeline_index
+        return self.renderer.render_frame(index.frame_at(index.time_to_frame(time)))
+
+    def export_timeline(self, fmt: str, path: Optional[str] = None) -> Path:
+        raise ValueError("Timeline export is not supported for scenes, export each character's track on its own")
+
+    # Keyframes where any character starts speaking
+    def _speech(self) -> np.ndarray:
+        return np.any([analyzer.speech_segments for analyzer in self.analyzers], axis=0)
+
+    def _iter_timeline(self) -> Iterator[SceneFrame]:
+        return iter_scene_timeline(self.analyzers, self.configs, self.config)
+
+    # The video's audio: the main file when every character comes from it, otherwise
+    # all tracks mixed at their own levels for the length of the longest. Without
+    # ffmpeg there is no video to mix for, only the frames are kept.
+    @contextmanager
+    def _scene_audio(self):
+        files = list(dict.fromkeys(c.audio_file for c in self.configs))
+        if files == [self.config.audio_file] or not VideoEncoder.available():
+            yield
+            return
+
+        audio_file = self.config.audio_file
+        with tempfile.TemporaryDirectory(prefix="awdioh_") as workdir:
+            mix = str(Path(workdir) / 'scene_mix.wav')
+            cmd = ['ffmpeg', '-y', '-loglevel', 'error']
+            for file in files:
+                cmd += ['-i', file]
+            cmd += ['-filter_complex', f'amix=inputs={len(files)}:duration=longest:normalize=0', mix]
+            subprocess.run(cmd, check=True, capture_output=True)
+
+            self.config.audio_file = mix
+            try:
+                yield
+            finally:
+                self.config.audio_file = audio_file
@@ -0,0 +1,85 @@
+import time
+from dataclasses import dataclass
+from multiprocessing import cpu_count
+from typing import List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from core.encoder import VideoEncoder
+
+# Frames rendered in the parent to time rendering and encoding
+CALIBRATION_FRAMES = 12
+
+# Frames between rebalancing decisions
+REBALANCE_INTERVAL = 24
+
+# Encoder threads do not scale linearly; each extra thread is worth a bit less
+def _thread_efficiency(threads: int) -> float:
+    return 1.0 / (1.0 + 0.05 * (threads - 1))
+
+@dataclass
+class Schedule:
+    workers: int
+    encoder_threads: int
+    render_fps: float # per worker
+    encode_fps: float # per encoder thread
+
+    def expected_fps(self) -> float:
+        return min(
+            self.workers * self.render_fps,
+            self.encoder_threads * self.encode_fps * _thread_efficiency(self.encoder_threads)
+        )
+
+    def describe(self) -> str:
+        return (f"{self.workers} render worker(s) at {self.render_fps:.1f} fps each, "
+                f"{self.encoder_threads} encoder thread(s) at {self.encode_fps:.1f} fps each, "
+                f"~{self.expected_fps():.1f} fps expected")
+
+# Splits the cores between render workers and the encoder, then keeps the split honest:
+# when frames pile up in front of ffmpeg, fewer renders run at once and their cores go
+# to the encoder; when ffmpeg waits on frames, more renders run (up to the pool size).
+class WorkerScheduler:
+    def __init__(self, max_workers: int, cores: Optional[int] = None):
+        self.max_workers = max(1, max_workers)
+        self.cores = cores or cpu_count()
+        self.active = self.max_workers
+        # Queue depth summed over the frames since the last rebalance
+        self._depth_frames = 0
+        self._frames = 0
+
+    # Pick the split that maximizes end-to-end fps from measured seconds per frame
+    def plan(self, render_seconds: float, encode_seconds: float) -> Schedule:
+        render_fps = 1.0 / max(render_seconds, 1e-6)
+        encode_fps = 1.0 / max(encode_seconds, 1e-6)
+
+        best = None
+        for workers in range(1, self.max_workers + 1):
+            schedule = Schedule(workers, max(1, self.cores - workers), render_fps, encode_fps)
+            if best is None or schedule.expected_fps() > best.expected_fps():
+                best = schedule
+
+        self.active = best.workers
+        return best
+
+    # Feed the writer queue depth after each batch of `frames` frames, returns the renders to keep in flight
+    def observe(self, depth: int, capacity: int, frames: int = 1) -> int:
+        self._depth_frames += depth * frames
+        self._frames += frames
+        if self._frames >= REBALANCE_INTERVAL:
+            average = self._depth_frames / self._frames
+            self._depth_frames = 0
+            self._frames = 0
+            if average >= capacity * 0.9 and self.active > 1:
+                self.active -= 1
+            elif average <= capacity * 0.1 and self.active < self.max_workers:
+                self.active += 1
+        return self.active
+
+# Seconds per frame for one encoder thread; a one-frame run takes out ffmpeg's startup
+def measure_encode(encoder: 'VideoEncoder', images: List[bytes], width: int, height: int,
+                   pixel_format: str = 'rgb24') -> float:
+    timings = []
+    for sample in (images[:1], images):
+        start = time.perf_counter()
+        encoder.encode_null(sample, width, height, threads=1, pixel_format=pixel_format)
+        timings.append(time.perf_counter() - start)
+    return max((timings[1] - timings[0]) / max(1, len(images) - 1), 1e-4)
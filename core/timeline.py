@@ -0,0 +1,203 @@
+import csv
+import json
+from dataclasses import replace
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, TYPE_CHECKING
+
+from core.animation_state import AnimationState, FrameState
+
+if TYPE_CHECKING:
+    from utils import Config
+    from core.audio_analyzer import AudioAnalyzer
+
+# Output frames each animation tick is held for (animation.rate "on twos" etc.)
+def hold_frames(config: 'Config') -> int:
+    rate = config.animation.rate
+    if not rate:
+        return 1
+    return max(1, round(config.output.fps / rate))
+
+# State pass: resolve every frame's layer selection and offsets
+def build_timeline(analyzer: 'AudioAnalyzer', config: 'Config') -> List[FrameState]:
+    return list(iter_timeline(analyzer, config))
+
+# The same state pass, one frame at a time; held frames repeat their tick's state
+def iter_timeline(analyzer: 'AudioAnalyzer', config: 'Config') -> Iterator[FrameState]:
+    state = AnimationState(config)
+    hold = hold_frames(config)
+    fps = config.output.fps
+    for i in range(analyzer.frames):
+        if i % hold == 0:
+            tick = _step(state, analyzer, i, fps, hold)
+            yield tick
+        else:
+            yield held_frame(tick, i, fps)
+
+# A tick's state shown again at a later output frame
+def held_frame(tick: FrameState, frame_idx: int, fps: int) -> FrameState:
+    return replace(tick, frame_idx=frame_idx, time=frame_idx / fps)
+
+# Advance the state by `hold` output frames from frame i and snapshot it.
+# Change points and emphasis anywhere in the held span still count.
+def _step(state: AnimationState, analyzer: 'AudioAnalyzer', i: int, fps: int, hold: int = 1) -> FrameState:
+    time = i / fps
+    talking = bool(analyzer.is_talking(i))
+    span = range(i, min(i + hold, analyzer.frames))
+
+    state.advance(
+        time,
+        talking,
+        any(analyzer.is_change_point(j) for j in span),
+        analyzer.get_energy(i),
+        any(analyzer.has_emphasis(j) for j in span),
+        hold / fps
+    )
+    return state.snapshot(i, time, talking)
+
+# Random access to single frames: one state pass keeps a checkpoint every
+# `interval` frames, any frame is then rebuilt by replaying at most that many
+class TimelineIndex:
+    def __init__(self, analyzer: 'AudioAnalyzer', config: 'Config', interval: int = 240):
+        self.analyzer = analyzer
+        self.config = config
+        self.hold = hold_frames(config)
+        self.frames = analyzer.frames
+
+        # Checkpoints land on animation ticks
+        self.interval = max(self.hold, -(-interval // self.hold) * self.hold)
+
+        # Checkpoint k holds the state before frame k * interval
+        self.checkpoints = []
+        state = self._new_state()
+        for i in range(0, self.frames, self.hold):
+            if i % self.interval == 0:
+                self.checkpoints.append(self._checkpoint(state))
+            self._advance(state, i)
+
+    def frame_at(self, frame_idx: int):
+        if not 0 <= frame_idx < self.frames:
+            raise IndexError(f"Frame {frame_idx} out of range (0-{self.frames - 1})")
+
+        start = (frame_idx // self.interval) * self.interval
+        state = self._restore(self.checkpoints[start // self.interval])
+
+        tick = frame_idx - frame_idx % self.hold
+        for i in range(start, tick + 1, self.hold):
+            frame_state = self._advance(state, i)
+        return frame_state if tick == frame_idx else held_frame(frame_state, frame_idx, self.config.output.fps)
+
+    def time_to_frame(self, time: float) -> int:
+        return min(max(int(time * self.config.output.fps), 0), self.frames - 1)
+
+    # The state being indexed; a scene's index holds every character's
+    def _new_state(self) -> AnimationState:
+        return AnimationState(self.config)
+
+    def _checkpoint(self, state: AnimationState):
+        return state.checkpoint()
+
+    def _restore(self, checkpoint) -> AnimationState:
+        state = self._new_state()
+        state.restore(checkpoint)
+        return state
+
+    def _advance(self, state: AnimationState, i: int) -> FrameState:
+        return _step(state, self.analyzer, i, self.config.output.fps, self.hold)
+
+# Per-frame channels written by the timeline export
+CHANNELS = (
+    'talking', 'mouth', 'blinking', 'eyebrow_raised', 'eyebrow_amount',
+    'eye_x', 'eye_y', 'head_bob_x', 'head_bob_y', 'breathing_x', 'breathing_y',
+)
+
+EXPORT_FORMATS = ('json', 'csv', 'npz')
+
+# Timeline as one list of values per channel
+def timeline_channels(timeline: List[FrameState]) -> Dict[str, list]:
+    channels = {name: [] for name in CHANNELS}
+    for frame in timeline:
+        channels['talking'].append(frame.talking)
+        channels['mouth'].append(frame.mouth)
+        channels['blinking'].append(frame.blinking)
+        channels['eyebrow_raised'].append(frame.eyebrow_raised)
+        channels['eyebrow_amount'].append(round(frame.eyebrow_amount, 4))
+        channels['eye_x'].append(round(frame.eye_offset[0], 4))
+        channels['eye_y'].append(round(frame.eye_offset[1], 4))
+        channels['head_bob_x'].append(round(frame.head_bob_offset[0], 4))
+        channels['head_bob_y'].append(round(frame.head_bob_offset[1], 4))
+        channels['breathing_x'].append(round(frame.breathing_offset[0], 4))
+        channels['breathing_y'].append(round(frame.breathing_offset[1], 4))
+    return channels
+
+# Run-length keyframes: [start_frame, length, value] per run of equal values
+def run_length(values: list) -> List[list]:
+    runs = []
+    for i, value in enumerate(values):
+        if runs and runs[-1][2] == value:
+            runs[-1][1] += 1
+        else:
+            runs.append([i, 1, value])
+    return runs
+
+# Write the timeline as json, csv (plus a keyframes csv) or npz
+def export_timeline(
+    timeline: List[FrameState],
+    path: str,
+    fmt: str,
+    fps: int,
+    audio_file: Optional[str] = None
+) -> Path:
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown timeline format '{fmt}' (expected one of {', '.join(EXPORT_FORMATS)})")
+
+    path = Path(path).with_suffix(f'.{fmt}')
+    channels = timeline_channels(timeline)
+    keyframes = {name: run_length(values) for name, values in channels.items()}
+
+    if fmt == 'json':
+        data = {
+            'audio_file': audio_file,
+            'fps': fps,
+            'frames': len(timeline),
+            'duration': len(timeline) / fps,
+            'channels': channels,
+            'keyframes': keyframes,
+        }
+        with open(path, 'w') as f:
+            json.dump(data, f)
+
+    elif fmt == 'csv':
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['frame', 'time', *CHANNELS])
+            for i in range(len(timeline)):
+                writer.writerow([i, round(i / fps, 6), *(channels[name][i] for name in CHANNELS)])
+
+        with open(path.with_suffix('.keyframes.csv'), 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['channel', 'start_frame', 'length', 'value'])
+            for name, runs in keyframes.items():
+                for start, length, value in runs:
+                    writer.writerow([name, start, length, value])
+
+    else:
+        import numpy as np
+
+        # Mouth shapes are stored as indices into mouth_names
+        mouth_names = sorted(set(channels['mouth']))
+        arrays = {
+            'fps': np.array(fps),
+            'time': np.arange(len(timeline)) / fps,
+            'mouth_names': np.array(mouth_names),
+        }
+        for name, values in channels.items():
+            if name == 'mouth':
+                values = [mouth_names.index(v) for v in values]
+            arrays[name] = np.array(values)
+
+            runs = run_length(values)
+            arrays[f'keyframes_{name}'] = np.array([[r[0], r[1]] for r in runs], dtype=np.int64).reshape(-1, 2)
+            arrays[f'keyframes_{name}_value'] = np.array([r[2] for r in runs])
+        np.savez_compressed(path, **arrays)
+
+    return path
@@ -0,0 +1,232 @@
+import time
+import random
+import shutil
+import subprocess
+from pathlib import Path
+from dataclasses import asdict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from utils import Config, Reporter
+from core.audio_analyzer import AudioAnalyzer
+from core.asset_manager import AssetManager
+from core.animation_state import FrameState
+from core.encoder import VideoEncoder
+from core.generator import AnimationGenerator
+
+# Seconds to wait for an editor to finish writing before reloading
+SETTLE_TIME = 0.3
+
+# Asset file behind each layer, keyed by a stable layer name
+def asset_paths(config: Config) -> Dict[str, Path]:
+    directory = Path(config.assets.directory)
+    paths = {
+        'base': directory / config.assets.base,
+        'eyes_open': directory / config.assets.eyes_open,
+        'eyes_closed': directory / config.assets.eyes_closed,
+    }
+    for name, filename in config.assets.mouths.items():
+        paths[f'mouth:{name}'] = directory / filename
+    for name, filename in config.assets.eyebrows.items():
+        paths[f'eyebrows:{name}'] = directory / filename
+    return paths
+
+# Does this frame draw the given layer
+def uses_layer(frame_state: FrameState, layer: str, assets: AssetManager) -> bool:
+    if layer == 'eyes_open':
+        return not frame_state.blinking
+    if layer == 'eyes_closed':
+        return frame_state.blinking
+
+    kind, _, name = layer.partition(':')
+    if kind == 'mouth':
+        mouth = frame_state.mouth if frame_state.mouth in assets.mouths else 'closed'
+        return mouth == name
+    if kind == 'eyebrows':
+        return (name == 'raised') == frame_state.eyebrow_raised
+    return True
+
+# Keep the job in memory and re-render only what asset or config edits touch
+class Watcher:
+    def __init__(
+        self,
+        generator: AnimationGenerator,
+        config_path: str,
+        reload_config: Callable[[], Config],
+        interval: float = 1.0
+    ):
+        self.generator = generator
+        self.config_path = Path(config_path)
+        self.reload_config = reload_config
+        self.interval = interval
+
+        # Pin the seed so state passes after an edit line up with the old one
+        if self.config.animation.seed is None:
+            self.config.animation.seed = random.randrange(2 ** 31)
+        self.seed = self.config.animation.seed
+
+        self.frames_dir = Path(self.config.performance.frames_directory)
+        self.segments_dir = self.frames_dir / 'segments'
+        self.timeline: List[FrameState] = []
+        self.segments: List[List[str]] = []
+
+    @property
+    def config(self) -> Config:
+        return self.generator.config
+
+    @property
+    def events(self) -> Reporter:
+        return self.generator.events
+
+    def run(self):
+        if not VideoEncoder.available():
+            raise RuntimeError("Watch mode needs FFmpeg to encode segments")
+
+        self.segments_dir.mkdir(parents=True, exist_ok=True)
+        self.timeline = self.generator._build_timeline()
+        self._update(set(range(len(self.timeline))), reencode_all=True)
+
+        files = self._file_state()
+        self.events.info(f"Watching {self.config.assets.directory} and {self.config_path} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(self.interval)
+                current = self._file_state()
+                if current == files:
+                    continue
+
+                # Let the writer finish, then reload
+                time.sleep(SETTLE_TIME)
+                current = self._file_state()
+                changed = {key for key in set(files) | set(current) if files.get(key) != current.get(key)}
+                files = current
+                self._handle_changes(changed)
+        except KeyboardInterrupt:
+            self.events.info("Stopped watching")
+        finally:
+            if self.config.performance.cleanup_frames and not self.config.debug.keep_frames:
+                shutil.rmtree(self.frames_dir, ignore_errors=True)
+
+    # (mtime, size) of every watched file, None when missing
+    def _file_state(self) -> Dict[str, Optional[Tuple[int, int]]]:
+        paths = asset_paths(self.config)
+        paths['config'] = self.config_path
+
+        state = {}
+        for key, path in paths.items():
+            try:
+                stat = path.stat()
+                state[key] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                state[key] = None
+        return state
+
+    def _handle_changes(self, changed: Set[str]):
+        start = time.time()
+        dirty: Set[int] = set()
+        reencode_all = False
+        layers = {key for key in changed if key != 'config'}
+
+        if 'config' in changed:
+            try:
+                new_config = self.reload_config()
+            except Exception as e:
+                self.events.error(f"Failed to reload configuration: {e}")
+                return
+            config_dirty, config_layers, reencode_all = self._apply_config(new_config)
+            dirty |= config_dirty
+            layers |= config_layers
+
+        if layers:
+            old_assets = self.generator.assets
+            try:
+                assets = AssetManager(self.config)
+            except Exception as e:
+                self.events.error(f"Failed to reload assets: {e}")
+                return
+            self.generator._assets = assets
+            self.generator._renderer = None
+
+            if assets.has_eyebrows != old_assets.has_eyebrows:
+                layers.add('base')
+            for i, frame_state in enumerate(self.timeline):
+                if any(uses_layer(frame_state, layer, assets) for layer in layers):
+                    dirty.add(i)
+
+        if not dirty and not reencode_all:
+            return
+
+        self.events.info(f"Change detected: {', '.join(sorted(changed))}")
+        self._update(dirty, reencode_all)
+        self.events.info(f"Updated in {time.time() - start:.1f}s")
+
+    # Swap in a reloaded config, return (dirty frames, changed layers, re-encode everything)
+    def _apply_config(self, new_config: Config) -> Tuple[Set[int], Set[str], bool]:
+        old_config = self.config
+
+        # Runtime settings stay as started
+        new_config.performance = old_config.performance
+        new_config.debug = old_config.debug
+        if new_config.animation.seed is None:
+            new_config.animation.seed = self.seed
+
+        self.generator.config = new_config
+        self.generator._renderer = None
+        self.generator._timeline_index = None
+
+        # New analysis invalidates every frame
+        if (asdict(new_config.audio) != asdict(old_config.audio) or
+                new_config.output.fps != old_config.output.fps):
+            self.generator.analyzer = AudioAnalyzer(new_config.audio_file, new_config)
+            self.timeline = self.generator._build_timeline()
+            return set(range(len(self.timeline))), set(), True
+
+        dirty = set()
+        if asdict(new_config.animation) != asdict(old_config.animation):
+            old_timeline = self.timeline
+            self.timeline = self.generator._build_timeline()
+            dirty = {
+                i for i, (old, new) in enumerate(zip(old_timeline, self.timeline))
+                if old.render_key() != new.render_key()
+            }
+
+        old_paths, new_paths = asset_paths(old_config), asset_paths(new_config)
+        layers = {key for key in set(old_paths) | set(new_paths) if old_paths.get(key) != new_paths.get(key)}
+
+        reencode_all = asdict(new_config.output) != asdict(old_config.output)
+        return dirty, layers, reencode_all
+
+    # Re-render dirty frames, re-encode the segments holding them and rebuild the outputs
+    def _update(self, dirty: Set[int], reencode_all: bool = False):
+        fps = self.config.output.fps
+        segment_frames = max(1, int(self.config.performance.segment_seconds * fps))
+        encoder = self.generator._encoder()
+
+        if dirty:
+            self.generator._render_frames([self.timeline[i] for i in sorted(dirty)])
+
+        count = (len(self.timeline) + segment_frames - 1) // segment_frames
+        if reencode_all or len(self.segments) != count:
+            to_encode = set(range(count))
+        else:
+            to_encode = {i // segment_frames for i in dirty}
+
+        self.segments = [
+            [str(self.segments_dir / f'segment_{k:05d}_{t}.mp4') for t in range(len(encoder.targets))]
+            for k in range(count)
+        ]
+
+        try:
+            for k in sorted(to_encode):
+                start = k * segment_frames
+                length = min(segment_frames, len(self.timeline) - start)
+                encoder.encode_segment(str(self.frames_dir), start, length, self.segments[k],
+                                       self.generator.assets.base.size)
+            encoder.concat_segments(self.segments, str(self.segments_dir))
+        except subprocess.CalledProcessError as e:
+            self.events.error("FFmpeg failed")
+            self.events.log(e.stderr.decode())
+            return
+
+        self.events.info(f"Re-rendered {len(dirty)} frame(s), re-encoded {len(to_encode)}/{count} segment(s)")
+        for target in encoder.targets:
+            self.events.output(target.file)
@@ -2,10 +2,135 @@ import sys
 import argparse
 from pathlib import Path
 
-from utils import load_config
-from core import AnimationGenerator
+from utils import load_config, open_event_stream, validate_config
+
+# Check config and assets without loading the audio stack
+def validate(argv):
+    parser = argparse.ArgumentParser(
+        prog="main.py validate",
+        description="Validate a configuration file and its assets"
+    )
+    parser.add_argument(
+        '-c', '--config',
+        default='config.yaml',
+        help='Configuration file (default: config.yaml)'
+    )
+    parser.add_argument(
+        '-a', '--assets',
+        help='Assets directory (overrides config)'
+    )
+    args = parser.parse_args(argv)
+
+    if not Path(args.config).exists():
+        print(f"WARNING: Config file not found, using defaults: {args.config}")
+
+    overrides = {}
+    if args.assets:
+        overrides['assets.directory'] = args.assets
+
+    try:
+        config = load_config(args.config, None, **overrides)
+    except Exception as e:
+        print(f"ERROR: Failed to load configuration: {e}")
+        sys.exit(1)
+
+    report = validate_config(config)
+    for warning in report.warnings:
+        print(f"WARNING: {warning}")
+    for error in report.errors:
+        print(f"ERROR: {error}")
+
+    if not report.ok:
+        sys.exit(1)
+    print(f"✓ {args.config} is valid")
+
+# Animate from a live audio feed, writing raw frames as they are due
+def live(argv):
+    parser = argparse.ArgumentParser(
+        prog="main.py live",
+        description="Drive the face from streaming audio and output raw rgb24 video"
+    )
+    parser.add_argument(
+        'source',
+        help="'-' or a named pipe for raw s16le PCM, or an audio file to replay in real time"
+    )
+    parser.add_argument(
+        '-c', '--config',
+        default='config.yaml',
+        help='Configuration file (default: config.yaml)'
+    )
+    parser.add_argument(
+        '-a', '--assets',
+        help='Assets directory (overrides config)'
+    )
+    parser.add_argument(
+        '-o', '--output',
+        default='-',
+        help="Raw video output: '-' for stdout or a named pipe (default: -)"
+    )
+    parser.add_argument(
+        '--fps',
+        type=int,
+        help='Frames per second (overrides config)'
+    )
+    parser.add_argument(
+        '--sample-rate',
+        type=int,
+        help='Raw PCM sample rate (overrides config)'
+    )
+    parser.add_argument(
+        '--channels',
+        type=int,
+        help='Raw PCM channels (overrides config)'
+    )
+    parser.add_argument(
+        '--latency',
+        type=float,
+        help='Latency budget in ms before frames are dropped (overrides config)'
+    )
+    args = parser.parse_args(argv)
+
+    overrides = {}
+    if args.assets:
+        overrides['assets.directory'] = args.assets
+    if args.fps:
+        overrides['output.fps'] = args.fps
+    if args.sample_rate:
+        overrides['live.sample_rate'] = args.sample_rate
+    if args.channels:
+        overrides['live.channels'] = args.channels
+    if args.latency is not None:
+        overrides['live.latency_ms'] = args.latency
+
+    # stdout may carry the video, so messages go to stderr
+    try:
+        config = load_config(args.config, None, **overrides)
+
+        from core.live import LiveSession, open_source
+
+        session = LiveSession(config, open_source(args.source, config), args.output)
+        width, height = session.frame_size
+        print(
+            f"Live: {width}x{height} rgb24 @ {config.output.fps}fps, e.g. "
+            f"ffplay -f rawvideo -pixel_format rgb24 -video_size {width}x{height} "
+            f"-framerate {config.output.fps} -",
+            file=sys.stderr
+        )
+        stats = session.run()
+    except Exception as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"✓ Live session ended: {stats.summary()}", file=sys.stderr)
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'validate':
+        validate(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == 'live':
+        live(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(
         description="Facial Animation from Audio",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -16,12 +141,30 @@ Examples:
   
   # Custom config and output
   python main.py audio.wav -c my_config.yaml -o output.mp4
+
+  # Several styles from one analysis pass (output_config_calm.mp4, ...)
+  python main.py audio.wav -c config.yaml -c config_calm.yaml -c config_energetic.yaml
   
   # Override specific settings
   python main.py audio.wav --fps 30 --no-parallel
   
+  # Re-render on asset/config edits
+  python main.py audio.wav --watch
+
   # Keep frames for inspection
   python main.py audio.wav --keep-frames
+
+  # Single frame at 12.5s
+  python main.py audio.wav --still 12.5 -o frame.png
+
+  # Animation curves only (writes curves.json, no rendering)
+  python main.py audio.wav --export-timeline json -o curves.json
+
+  # Check config and assets only
+  python main.py validate -c my_config.yaml
+
+  # Live from a microphone (raw PCM on stdin, raw video to ffplay)
+  arecord -f S16_LE -r 44100 -c 1 -t raw | python main.py live - | ffplay -f rawvideo -pixel_format rgb24 -video_size 2048x2048 -framerate 24 -
         """
     )
 
@@ -34,8 +177,8 @@ Examples:
     # Configuration
     parser.add_argument(
         '-c', '--config',
-        default='config.yaml',
-        help='Configuration file (default: config.yaml)'
+        action='append',
+        help='Configuration file, repeat for several variants from one analysis (default: config.yaml)'
     )
     
     # Output options
@@ -48,6 +191,17 @@ Examples:
         type=int,
         help='Frames per second (overrides config)'
     )
+    parser.add_argument(
+        '--still',
+        type=float,
+        metavar='SECONDS',
+        help='Only render the frame at this time to a PNG (-o frame.png)'
+    )
+    parser.add_argument(
+        '--export-timeline',
+        choices=['json', 'csv', 'npz'],
+        help='Only write per-frame animation data (next to the output file), no video'
+    )
     
     # Asset options
     parser.add_argument(
@@ -66,8 +220,35 @@ Examples:
         type=int,
         help='Number of worker processes'
     )
+    parser.add_argument(
+        '--backend',
+        choices=['python', 'ffmpeg'],
+        help='Compositing backend (overrides config)'
+    )
+    
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Keep running and re-render only what asset or config edits change'
+    )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Reuse unchanged video segments from the previous run'
+    )
     
     # Debug options
+    parser.add_argument(
+        '--events',
+        metavar='FILE|FD',
+        help='Write JSON-lines progress events to a file or file descriptor (replaces the progress bar)'
+    )
+    parser.add_argument(
+        '--events-interval',
+        type=float,
+        metavar='SECONDS',
+        help='Seconds between progress events (default: 1.0)'
+    )
     parser.add_argument(
         '--keep-frames',
         action='store_true',
@@ -77,6 +258,11 @@ Examples:
         '--frames-dir',
         help='Temporary frames directory'
     )
+    parser.add_argument(
+        '--frame-format',
+        choices=['png', 'raw', 'npy', 'qoi', 'webp'],
+        help='Frame file format (overrides config)'
+    )
     parser.add_argument(
         '-v', '--verbose',
         action='store_true',
@@ -116,6 +302,11 @@ Examples:
     )
     
     args = parser.parse_args()
+    args.config = args.config or ['config.yaml']
+
+    # Open the event stream first: on stdout it moves every message below to stderr
+    if args.events:
+        open_event_stream(args.events)
 
     # Check if audio file exists
     if not Path(args.audio_file).exists():
@@ -135,11 +326,21 @@ Examples:
         overrides['performance.parallel'] = False
     if args.workers:
         overrides['performance.num_workers'] = args.workers
+    if args.backend:
+        overrides['performance.backend'] = args.backend
+    if args.events:
+        overrides['debug.events'] = args.events
+    if args.events_interval:
+        overrides['debug.event_interval'] = args.events_interval
+    if args.incremental:
+        overrides['performance.incremental'] = True
     if args.keep_frames:
         overrides['debug.keep_frames'] = True
         overrides['performance.cleanup_frames'] = False
     if args.frames_dir:
         overrides['performance.frames_directory'] = args.frames_dir
+    if args.frame_format:
+        overrides['performance.frame_format'] = args.frame_format
     if args.verbose:
         overrides['debug.verbose'] = True
     if args.no_progress:
@@ -161,9 +362,16 @@ Examples:
         overrides['animation.eyes.lerp_enabled'] = False
         overrides['animation.eyebrows.lerp_enabled'] = False
     
-    # Load configuration
+    if args.watch and len(args.config) > 1:
+        print("ERROR: --watch supports a single config")
+        sys.exit(1)
+
+    # Load configuration(s)
     try:
-        config = load_config(args.config, args.audio_file, **overrides)
+        configs = [
+            (Path(path).stem, load_config(path, args.audio_file, **overrides))
+            for path in args.config
+        ]
     except Exception as e:
         print(f"ERROR: Failed to load configuration: {e}")
         if args.verbose:
@@ -173,10 +381,40 @@ Examples:
     
     # Generate animation
     try:
+        from core import AnimationGenerator, BatchGenerator
+
         print(f"Generating animation from: {args.audio_file}")
-        print(f"Configuration: {args.config}")
+        print(f"Configuration: {', '.join(args.config)}")
         
-        generator = AnimationGenerator(config)
+        scenes = [name for name, config in configs if config.scene.characters]
+        if scenes and (len(configs) > 1 or args.watch):
+            print(f"ERROR: Scene configs ({', '.join(scenes)}) render on their own, without --watch or other configs")
+            sys.exit(1)
+
+        if len(configs) > 1:
+            generator = BatchGenerator(configs)
+        elif scenes:
+            from core import SceneGenerator
+            generator = SceneGenerator(configs[0][1])
+        else:
+            generator = AnimationGenerator(configs[0][1])
+
+        if args.watch:
+            from core.watch import Watcher
+
+            reload_config = lambda: load_config(args.config[0], args.audio_file, **overrides)
+            Watcher(generator, args.config[0], reload_config).run()
+            return
+
+        if args.still is not None:
+            generator.save_still(args.still)
+            return
+
+        if args.export_timeline:
+            generator.export_timeline(args.export_timeline)
+            print("\n✓ Timeline export complete!")
+            return
+
         generator.generate()
         
         print("\n✓ Animation complete!")
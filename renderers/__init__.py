@@ -1,3 +1,4 @@
 from .frame_renderer import FrameRenderer
+from .ffmpeg_compositor import FFmpegCompositor
 
-__all__ = ['FrameRenderer']
+__all__ = ['FrameRenderer', 'FFmpegCompositor']
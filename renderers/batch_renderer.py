@@ -0,0 +1,123 @@
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+from renderers.yuv import raw_frame_bytes, to_raw, yuv420_planes
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+# Box (left, top, right, bottom) a render key changes, and its pixels per output plane
+Patch = Tuple[Tuple[int, int, int, int], List[np.ndarray]]
+
+# Frames of a batch (indices into it) that share one patch
+PatchGroup = Tuple[List[int], Patch]
+
+# Renders a slice of the timeline into one contiguous block of raw frames
+# (frames x bytes per frame) that is written to ffmpeg as is.
+# Frames are grouped by render key, and each group's changed region is
+# composited and converted once (`patches`, the part pool workers run).
+# `assemble` starts every frame as the base, converted once up front, and
+# copies each patch into all of its frames with one array assignment per plane.
+# Renderers without `layers` (scenes) redraw the whole frame per render key.
+class BatchRenderer:
+    def __init__(self, renderer, pixel_format: str, cache_frames: int = 8):
+        self.renderer = renderer
+        self.pixel_format = pixel_format
+        self.cache_frames = cache_frames
+        self.width, self.height = renderer.frame_size
+        self.frame_bytes = raw_frame_bytes(self.width, self.height, pixel_format)
+
+        # Patches by render key, reused across batches
+        self._patches: 'OrderedDict[tuple, Patch]' = OrderedDict()
+
+        self._base = None
+        if hasattr(renderer, 'layers'):
+            self._base = renderer.assets.base
+            self._base_raw = np.frombuffer(to_raw(self._base, pixel_format), dtype=np.uint8)
+
+    # (block, frames served from an earlier frame's patch)
+    def render(self, frames: Sequence) -> Tuple[np.ndarray, int]:
+        groups, hits = self.patches(frames)
+        return self.assemble(len(frames), groups), hits
+
+    # One patch per render key in the batch, and the frames that reuse a patch
+    def patches(self, frames: Sequence) -> Tuple[List[PatchGroup], int]:
+        groups: Dict[tuple, List[int]] = {}
+        for i, frame_state in enumerate(frames):
+            groups.setdefault(frame_state.render_key(), []).append(i)
+
+        hits = len(frames) - len(groups)
+        patches = []
+        for key, indices in groups.items():
+            if key in self._patches:
+                self._patches.move_to_end(key)
+                hits += 1
+                patch = self._patches[key]
+            else:
+                patch = self._patch(frames[indices[0]])
+                if self.cache_frames:
+                    self._patches[key] = patch
+                    if len(self._patches) > self.cache_frames:
+                        self._patches.popitem(last=False)
+            patches.append((indices, patch))
+        return patches, hits
+
+    def assemble(self, count: int, groups: List[PatchGroup]) -> np.ndarray:
+        block = np.empty((count, self.frame_bytes), dtype=np.uint8)
+        if self._base is not None:
+            block[:] = self._base_raw
+
+        planes = self._planes(block)
+        for indices, ((left, top, _, _), pixels) in groups:
+            for (plane, scale), values in zip(planes, pixels):
+                x, y = left // scale, top // scale
+                plane[indices, y:y + values.shape[0], x:x + values.shape[1]] = values
+        return block
+
+    # Per-plane views of the block: (frames x rows x columns[ x 3], subsampling)
+    def _planes(self, block: np.ndarray) -> List[Tuple[np.ndarray, int]]:
+        width, height = self.width, self.height
+        if self.pixel_format != 'yuv420p':
+            return [(block.reshape(-1, height, width, 3), 1)]
+
+        chroma_width, chroma_height = (width + 1) // 2, (height + 1) // 2
+        luma = width * height
+        chroma = chroma_width * chroma_height
+        return [
+            (block[:, :luma].reshape(-1, height, width), 1),
+            (block[:, luma:luma + chroma].reshape(-1, chroma_height, chroma_width), 2),
+            (block[:, luma + chroma:].reshape(-1, chroma_height, chroma_width), 2),
+        ]
+
+    # Composite and convert the region one render key changes
+    def _patch(self, frame_state) -> Patch:
+        if self._base is None:
+            box = (0, 0, self.width, self.height)
+            return box, self._convert(self.renderer.render_frame(frame_state))
+
+        layers = self.renderer.layers(frame_state)
+        box = self._region(layers)
+        if box is None: # every layer is off the frame
+            return (0, 0, 0, 0), []
+
+        patch = self._base.crop(box)
+        for image, x, y in layers:
+            patch.paste(image, (x - box[0], y - box[1]), image)
+        return box, self._convert(patch)
+
+    # Union of the layers' rectangles inside the frame, widened to even
+    # coordinates so chroma blocks line up with the full frame's
+    def _region(self, layers) -> Optional[Tuple[int, int, int, int]]:
+        left = max(0, min(x for _, x, _ in layers))
+        top = max(0, min(y for _, _, y in layers))
+        right = min(self.width, max(x + image.width for image, x, _ in layers))
+        bottom = min(self.height, max(y + image.height for image, _, y in layers))
+        if left >= right or top >= bottom:
+            return None
+        return (left - left % 2, top - top % 2, min(self.width, right + right % 2), min(self.height, bottom + bottom % 2))
+
+    def _convert(self, image: 'Image.Image') -> List[np.ndarray]:
+        if self.pixel_format == 'yuv420p':
+            return [np.asarray(plane) for plane in yuv420_planes(image)]
+        return [np.asarray(image.convert('RGB'))]
@@ -0,0 +1,112 @@
+from pathlib import Path
+from typing import List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from PIL import Image
+    from utils import Config
+    from core.asset_manager import AssetManager
+    from core.animation_state import FrameState
+
+# Overlay position for hidden layers (no overlap, so ffmpeg skips the blend)
+HIDDEN = -100000
+
+# Builds an ffmpeg filter graph that composites a timeline without drawing in Python
+class FFmpegCompositor:
+    def __init__(self, assets: 'AssetManager', config: 'Config'):
+        self.assets = assets
+        self.config = config
+
+    # Layer stack in paste order: (name, image, group, selection)
+    def _layer_specs(self) -> List[Tuple[str, 'Image.Image', str, object]]:
+        layers = [
+            ('eyes_open', self.assets.eyes_open, 'eyes', False),
+            ('eyes_closed', self.assets.eyes_closed, 'eyes', True),
+        ]
+        if self.assets.has_eyebrows:
+            layers.append(('eyebrows_normal', self.assets.eyebrows_normal, 'eyebrows', False))
+            layers.append(('eyebrows_raised', self.assets.eyebrows_raised, 'eyebrows', True))
+        for name, image in self.assets.mouths.items():
+            layers.append((f'mouth_{name}', image, 'mouth', name))
+        return layers
+
+    # Selection and placement of each layer group for a frame
+    def _frame_groups(self, frame_state: 'FrameState') -> dict:
+        mouth = frame_state.mouth if frame_state.mouth in self.assets.mouths else 'closed'
+        return {
+            'eyes': (frame_state.blinking, frame_state.eye_position),
+            'eyebrows': (frame_state.eyebrow_raised, frame_state.face_position),
+            'mouth': (mouth, frame_state.face_position),
+        }
+
+    # Write cropped layers and the command script, return (inputs, graph, video label)
+    def build(self, timeline: List['FrameState'], workdir: str) -> Tuple[List[str], List[str], str]:
+        workdir = Path(workdir)
+        fps = self.config.output.fps
+        duration = len(timeline) / fps
+
+        base_path = workdir / 'base.png'
+        self.assets.base.save(base_path, compress_level=1)
+        inputs = ['-loop', '1', '-framerate', str(fps), '-t', f'{duration:.6f}', '-i', str(base_path)]
+
+        # Sprites cropped to their visible area
+        layers = []
+        for name, image, group, selection in self._layer_specs():
+            bbox = image.getchannel('A').getbbox()
+            if bbox is None:
+                continue
+            path = workdir / f'{name}.png'
+            image.crop(bbox).save(path, compress_level=1)
+            inputs += ['-loop', '1', '-framerate', str(fps), '-i', str(path)]
+            layers.append((name, group, selection, bbox[0], bbox[1]))
+
+        commands_path = workdir / 'commands.txt'
+        commands_path.write_text(self._command_script(timeline, layers))
+
+        # Base -> sendcmd -> one overlay per layer
+        graph = [f"[0:v]sendcmd=f='{_escape(commands_path)}'[b0]"]
+        for i, (name, _, _, _, _) in enumerate(layers):
+            graph.append(
+                f"[b{i}][{i + 1}:v]overlay@{name}=x={HIDDEN}:y={HIDDEN}:eval=frame:shortest=1:format=rgb[b{i + 1}]"
+            )
+        return inputs, graph, f'[b{len(layers)}]'
+
+    # sendcmd script with one entry, run before the first frame reaches any overlay:
+    # each layer's x and y as a function of the frame number n. Placement then never
+    # depends on when a command reaches an overlay further down the graph.
+    def _command_script(self, timeline: List['FrameState'], layers: list) -> str:
+        # Per layer position for every frame
+        tracks = [[] for _ in layers]
+        for frame_state in timeline:
+            groups = self._frame_groups(frame_state)
+            for i, (name, group, selection, offset_x, offset_y) in enumerate(layers):
+                selected, (x, y) = groups[group]
+                if selected == selection:
+                    tracks[i].append((x + offset_x, y + offset_y))
+                else:
+                    tracks[i].append((HIDDEN, HIDDEN))
+
+        commands = []
+        for (name, _, _, _, _), track in zip(layers, tracks):
+            commands.append(f"overlay@{name} x '{_frame_expression([p[0] for p in track])}'")
+            commands.append(f"overlay@{name} y '{_frame_expression([p[1] for p in track])}'")
+        return "0.0 " + ", ".join(commands) + ";\n"
+
+# Per-frame values as a balanced tree of if(lt(n,N),A,B) over the frames where the
+# value changes, so each frame costs log2(changes) comparisons to evaluate.
+# overlay counts n from 1, so timeline frame i is n = i + 1.
+def _frame_expression(values: List[int]) -> str:
+    if not values:
+        return str(HIDDEN)
+    runs = [(1, values[0])] + [(i + 1, v) for i, v in enumerate(values) if i and v != values[i - 1]]
+
+    def tree(lo: int, hi: int) -> str:
+        if hi - lo == 1:
+            return str(runs[lo][1])
+        mid = (lo + hi) // 2
+        return f"if(lt(n,{runs[mid][0]}),{tree(lo, mid)},{tree(mid, hi)})"
+
+    return tree(0, len(runs))
+
+# Quote a path for use inside a filter graph option
+def _escape(path: Path) -> str:
+    return path.as_posix().replace("'", r"'\''")
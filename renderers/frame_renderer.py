@@ -1,108 +1,108 @@
-import math
 from PIL import Image
-from typing import Tuple, TYPE_CHECKING
+from itertools import zip_longest
+from typing import List, Optional, Tuple, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from utils import Config
     from core.asset_manager import AssetManager
-    from core.animation_state import AnimationState
+    from core.animation_state import FrameState
+
+# Sprite and the position it is pasted at
+Layer = Tuple[Image.Image, int, int]
+
+# (left, top, right, bottom)
+Box = Tuple[int, int, int, int]
 
 class FrameRenderer:
     def __init__(self, assets: 'AssetManager', config: 'Config'):
         self.assets = assets
         self.config = config
-    
+
+        # Persistent canvas for `draw`: the last frame drawn and its layers
+        self._canvas: Optional[Image.Image] = None
+        self._placed: List[Layer] = []
+
+    # Workers start without a canvas
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_canvas'] = None
+        state['_placed'] = []
+        return state
+
+    @property
+    def frame_size(self):
+        return self.assets.base.size
+
     # Render a single frame
-    def render_frame(
-        self,
-        state: 'AnimationState',
-        time: float,
-        talking: bool,
-        dt: float
-    ) -> Image.Image:
+    def render_frame(self, frame_state: 'FrameState') -> Image.Image:
         frame = self.assets.base.copy()
-        
-        # Head Bob
-        head_offset_calc = self._calculate_head_bob(time, talking)
-        state.update_head_bob(head_offset_calc[0], head_offset_calc[1], dt)
-        head_offset = state.get_head_bob_offset(head_offset_calc)
-        
-        # Breathing
-        breathing_offset_calc = self._calculate_breathing(time, talking)
-        state.update_breathing(breathing_offset_calc[0], breathing_offset_calc[1], dt)
-        breathing_offset = state.get_breathing_offset(breathing_offset_calc)
-        
-        # Combine Offsets
-        base_x = int(head_offset[0] + breathing_offset[0])
-        base_y = int(head_offset[1] + breathing_offset[1])
-        
-        # Eye Position
-        eye_calc = self._calculate_eye_position(time, state)
-        state.update_eye_position(eye_calc[0], eye_calc[1], dt)
-        eye_pos = state.get_eye_position()
-        
-        eye_x = int(eye_pos[0]) + base_x
-        eye_y = int(eye_pos[1]) + base_y
-        
-        # Paste Eyes
-        eye_img = self.assets.get_eyes(state.blinking)
-        frame.paste(eye_img, (eye_x, eye_y), eye_img)
-        
-        # Paste Eyebrows
-        eyebrow_img = self.assets.get_eyebrows(state.eyebrow_raised)
-        if eyebrow_img is not None:
-            frame.paste(eyebrow_img, (base_x, base_y), eyebrow_img)
-        
-        # Paste Mouth
-        mouth_img = self.assets.get_mouth(state.current_mouth)
-        frame.paste(mouth_img, (base_x, base_y), mouth_img)
-        
+        for image, x, y in self.layers(frame_state):
+            frame.paste(image, (x, y), image)
         return frame
-    
-    # Head Bob Offset
-    def _calculate_head_bob(self, time: float, talking: bool) -> Tuple[float, float]:
-        if not self.config.animation.head_bob.enabled:
-            return (0.0, 0.0)
-        
-        if self.config.animation.head_bob.only_when_talking and not talking:
-            return (0.0, 0.0)
-        
-        # Oscillate vertically when talking
-        y = math.sin(time * math.pi * 2 * self.config.animation.head_bob.speed)
-        y *= self.config.animation.head_bob.amount
-        
-        return (0.0, y)
-    
-    # Breathing Offset
-    def _calculate_breathing(self, time: float, talking: bool) -> Tuple[float, float]:
-        if not self.config.animation.breathing.enabled:
-            return (0.0, 0.0)
-        
-        # Gentle breathing - reduced when talking
-        scale = self.config.animation.breathing.talking_scale if talking else 1.0
-        y = math.sin(time * math.pi * 2 * self.config.animation.breathing.speed)
-        y *= self.config.animation.breathing.amount * scale
-        
-        return (0.0, y)
-    
-    # Final Eye Position
-    def _calculate_eye_position(self, time: float, state: 'AnimationState') -> Tuple[float, float]:
-        # Base drift
-        if self.config.animation.eyes.drift_enabled:
-            base_x = math.sin(time * self.config.animation.eyes.drift_speed) * \
-                     self.config.animation.eyes.drift_amount_x
-            base_y = math.cos(time * self.config.animation.eyes.drift_speed) * \
-                     self.config.animation.eyes.drift_amount_y
+
+    # Draw a frame over the previous one on the persistent canvas. Only the boxes
+    # of layers that changed (where they were and where they are now) are restored
+    # from the base, and every layer touching them is blended again inside them.
+    # Returns the canvas, which the next call draws over, and the boxes that
+    # changed; none when the frame looks exactly like the previous one.
+    def draw(self, frame_state: 'FrameState') -> Tuple[Image.Image, List[Box]]:
+        layers = self.layers(frame_state)
+        if self._canvas is None:
+            self._canvas = self.assets.base.copy()
+            self._placed = []
+            dirty = [(0, 0, *self.frame_size)]
         else:
-            base_x = 0.0
-            base_y = 0.0
-        
-        # Add eye dart
-        if state.eye_dart_active:
-            progress = state.eye_dart_progress
-            # Ease in-out
-            ease = progress * (2 - progress)
-            base_x += state.eye_dart_target[0] * ease
-            base_y += state.eye_dart_target[1] * ease
-        
-        return (base_x, base_y)
\ No newline at end of file
+            changed = []
+            for old, new in zip_longest(self._placed, layers):
+                if old is None or new is None or old[0] is not new[0] or old[1:] != new[1:]:
+                    changed += [layer for layer in (old, new) if layer is not None]
+            dirty = _merge(box for box in map(self._box, changed) if box is not None)
+
+        for box in dirty:
+            self._canvas.paste(self.assets.base.crop(box), box[:2])
+            for image, x, y in layers:
+                clip = _intersect(box, (x, y, x + image.width, y + image.height))
+                if clip is not None:
+                    piece = image.crop((clip[0] - x, clip[1] - y, clip[2] - x, clip[3] - y))
+                    self._canvas.paste(piece, clip[:2], piece)
+        self._placed = layers
+        return self._canvas, dirty
+
+    # A layer's rectangle inside the frame, None when it is off the frame
+    def _box(self, layer: Layer) -> Optional[Box]:
+        image, x, y = layer
+        return _intersect((0, 0, *self.frame_size), (x, y, x + image.width, y + image.height))
+
+    # Sprites pasted over the base, in order, with their positions in the frame
+    def layers(self, frame_state: 'FrameState') -> List[Layer]:
+        # Combined head bob + breathing offset
+        base_x, base_y = frame_state.face_position
+        eye_x, eye_y = frame_state.eye_position
+
+        # Eyes
+        eye_img, offset_x, offset_y = self.assets.get_eye_sprite(frame_state.blinking)
+        layers = [(eye_img, eye_x + offset_x, eye_y + offset_y)]
+
+        # Eyebrows + Mouth (cropped, they share the face offset)
+        for face_img, offset_x, offset_y in self.assets.get_face(frame_state.mouth, frame_state.eyebrow_raised):
+            layers.append((face_img, base_x + offset_x, base_y + offset_y))
+        return layers
+
+def _intersect(a: Box, b: Box) -> Optional[Box]:
+    box = (max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3]))
+    return box if box[0] < box[2] and box[1] < box[3] else None
+
+# Overlapping boxes joined, so no pixel is restored or blended twice
+def _merge(boxes) -> List[Box]:
+    merged: List[Box] = []
+    for box in boxes:
+        i = 0
+        while i < len(merged):
+            if _intersect(merged[i], box) is not None:
+                other = merged.pop(i)
+                box = (min(box[0], other[0]), min(box[1], other[1]), max(box[2], other[2]), max(box[3], other[3]))
+                i = 0
+            else:
+                i += 1
+        merged.append(box)
+    return merged
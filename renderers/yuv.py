@@ -0,0 +1,36 @@
+from PIL import Image
+from typing import Tuple
+
+# BT.601 limited range, the matrix ffmpeg uses for rgb24 -> yuv420p, as
+# (R, G, B, offset) rows for Y, U and V in PIL's convert(matrix=...) layout
+_YUV_MATRIX = (
+    65.481 / 255, 128.553 / 255, 24.966 / 255, 16.0,
+    -37.797 / 255, -74.203 / 255, 112.0 / 255, 128.0,
+    112.0 / 255, -93.786 / 255, -18.214 / 255, 128.0,
+)
+
+# Bytes of one raw frame in an ffmpeg pixel format
+def raw_frame_bytes(width: int, height: int, pixel_format: str) -> int:
+    if pixel_format == 'yuv420p':
+        return width * height + 2 * ((width + 1) // 2) * ((height + 1) // 2)
+    return width * height * 3
+
+# Planar yuv420p bytes (Y, then U and V at half resolution) of an RGB or RGBA image.
+# Alpha is dropped like convert('RGB') does. The matrix is linear, so chroma comes
+# from the 2x2 box average of RGB, a quarter of the pixels; odd sizes round up.
+def to_yuv420(image: Image.Image) -> bytes:
+    luma, u, v = yuv420_planes(image)
+    return luma.tobytes() + u.tobytes() + v.tobytes()
+
+# The Y, U and V planes as 'L' images
+def yuv420_planes(image: Image.Image) -> Tuple[Image.Image, Image.Image, Image.Image]:
+    rgb = image.convert('RGB')
+    luma = rgb.convert('L', _YUV_MATRIX[:4])
+    chroma = rgb.reduce(2).convert('RGB', _YUV_MATRIX)
+    return luma, chroma.getchannel('G'), chroma.getchannel('B')
+
+# Raw bytes of an image for an ffmpeg rawvideo input
+def to_raw(image: Image.Image, pixel_format: str) -> bytes:
+    if pixel_format == 'yuv420p':
+        return to_yuv420(image)
+    return image.convert('RGB').tobytes()
@@ -0,0 +1,58 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from utils import Config
+from core.audio_analyzer import AudioAnalyzer
+
+SAMPLE_RATE = 22050
+SIZE = (96, 80)
+
+# A layer of soft, partly transparent blobs, so blending rounds differently per pixel
+def _layer(rng: np.random.Generator, box) -> Image.Image:
+    pixels = np.zeros((SIZE[1], SIZE[0], 4), dtype=np.uint8)
+    left, top, right, bottom = box
+    pixels[top:bottom, left:right, :3] = rng.integers(0, 256, (bottom - top, right - left, 3))
+    pixels[top:bottom, left:right, 3] = rng.choice([0, 40, 128, 200, 255], (bottom - top, right - left))
+    return Image.fromarray(pixels, 'RGBA')
+
+@pytest.fixture
+def assets_dir(tmp_path) -> Path:
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 256, (SIZE[1], SIZE[0], 3), dtype=np.uint8)
+    Image.fromarray(base, 'RGB').save(tmp_path / 'base.png')
+    _layer(rng, (20, 10, 70, 30)).save(tmp_path / 'eyes_open.png')
+    _layer(rng, (20, 15, 70, 25)).save(tmp_path / 'eyes_closed.png')
+    for name, height in (('closed', 4), ('small', 8), ('medium', 12), ('wide', 16)):
+        _layer(rng, (30, 50, 66, 50 + height)).save(tmp_path / f'mouth_{name}.png')
+    # Eyebrows overlap the eyes and the mouth
+    _layer(rng, (18, 5, 72, 55)).save(tmp_path / 'eyebrows_normal.png')
+    _layer(rng, (18, 2, 72, 52)).save(tmp_path / 'eyebrows_raised.png')
+    return tmp_path
+
+@pytest.fixture
+def config(assets_dir) -> Config:
+    config = Config(audio_file='speech.wav')
+    config.assets.directory = str(assets_dir)
+    config.animation.seed = 7
+    config.debug.show_progress = False
+    return config
+
+# Tone bursts with silences between them, roughly like speech
+def speech_signal(seconds: float = 6.0) -> np.ndarray:
+    rng = np.random.default_rng(1)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    pitch = 120 + 60 * np.sin(2 * np.pi * 0.7 * t)
+    tone = np.sin(2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE)
+    envelope = (np.sin(2 * np.pi * 1.3 * t) > 0.2) * (0.3 + 0.7 * np.abs(np.sin(2 * np.pi * 3.1 * t)))
+    return (0.5 * tone * envelope + 0.01 * rng.standard_normal(len(t))).astype(np.float32)
+
+@pytest.fixture
+def analyzer(config) -> AudioAnalyzer:
+    return AudioAnalyzer(config.audio_file, config, signal=(speech_signal(), SAMPLE_RATE))
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+import core.audio_analyzer as audio_analyzer
+import core.memory as memory
+from core.audio_analyzer import AudioAnalyzer
+
+from conftest import SAMPLE_RATE, speech_signal
+
+# Stands in for the ffmpeg decoder: the same samples in uneven chunks
+class MemoryStream:
+    def __init__(self, signal: np.ndarray):
+        self.signal = signal
+        self.sample_rate = SAMPLE_RATE
+
+    def blocks(self, size: int):
+        rng = np.random.default_rng(size)
+        start = 0
+        while start < len(self.signal):
+            end = start + int(rng.integers(1, 2 * size))
+            yield self.signal[start:end]
+            start = end
+
+def assert_same_features(a: AudioAnalyzer, b: AudioAnalyzer):
+    assert a.frames == b.frames
+    np.testing.assert_allclose(a.rms, b.rms, rtol=1e-5, atol=1e-7)
+    np.testing.assert_allclose(a.f0, b.f0, rtol=1e-5, atol=1e-4)
+    np.testing.assert_array_equal(a.speech_segments, b.speech_segments)
+    np.testing.assert_array_equal(a.emphasis_points, b.emphasis_points)
+
+# A budget this small analyzes one second of frames at a time
+@pytest.mark.parametrize('max_memory_mb', [None, 1])
+def test_streamed_analysis_matches_whole_file(config, monkeypatch, max_memory_mb):
+    signal = speech_signal()
+    whole = AudioAnalyzer(config.audio_file, config, signal=(signal, SAMPLE_RATE))
+
+    config.performance.max_memory_mb = max_memory_mb
+    monkeypatch.setattr(memory, 'current_rss_mb', lambda: 1e6)
+    monkeypatch.setattr(audio_analyzer, 'open_audio_stream', lambda path, config: MemoryStream(signal))
+    streamed = AudioAnalyzer(config.audio_file, config)
+    assert streamed.audio is None
+    assert_same_features(whole, streamed)
+
+def test_blockwise_analysis_matches_whole_file(config, monkeypatch):
+    signal = speech_signal()
+    whole = AudioAnalyzer(config.audio_file, config, signal=(signal, SAMPLE_RATE))
+
+    config.performance.max_memory_mb = 1
+    monkeypatch.setattr(memory, 'current_rss_mb', lambda: 1e6)
+    blockwise = AudioAnalyzer(config.audio_file, config, signal=(signal, SAMPLE_RATE))
+    assert_same_features(whole, blockwise)
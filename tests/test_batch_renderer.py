@@ -0,0 +1,34 @@
+import pytest
+
+from core.asset_manager import AssetManager
+from core.timeline import build_timeline
+from renderers.batch_renderer import BatchRenderer
+from renderers.frame_renderer import FrameRenderer
+from renderers.yuv import to_raw
+
+@pytest.mark.parametrize('pixel_format', ['yuv420p', 'rgb24'])
+@pytest.mark.parametrize('batch_frames, cache_frames', [(1, 0), (7, 8), (64, 2)])
+def test_batches_match_converted_frames(analyzer, config, pixel_format, batch_frames, cache_frames):
+    renderer = FrameRenderer(AssetManager(config), config)
+    batch_renderer = BatchRenderer(renderer, pixel_format, cache_frames)
+    timeline = build_timeline(analyzer, config)
+
+    for start in range(0, len(timeline), batch_frames):
+        frames = timeline[start:start + batch_frames]
+        block, _ = batch_renderer.render(frames)
+        for frame_state, row in zip(frames, block):
+            assert row.tobytes() == to_raw(renderer.render_frame(frame_state), pixel_format), frame_state.frame_idx
+
+# Pool workers compute patches in their own renderer, the parent assembles them
+def test_worker_patches_assemble_in_parent(analyzer, config):
+    renderer = FrameRenderer(AssetManager(config), config)
+    worker = BatchRenderer(renderer, 'yuv420p')
+    parent = BatchRenderer(renderer, 'yuv420p')
+    timeline = build_timeline(analyzer, config)
+
+    for start in range(0, len(timeline), 10):
+        frames = timeline[start:start + 10]
+        groups, _ = worker.patches(frames)
+        block = parent.assemble(len(frames), groups)
+        for frame_state, row in zip(frames, block):
+            assert row.tobytes() == to_raw(renderer.render_frame(frame_state), 'yuv420p'), frame_state.frame_idx
@@ -0,0 +1,41 @@
+import random
+
+import pytest
+
+from renderers.ffmpeg_compositor import HIDDEN, _frame_expression
+
+# Evaluate an if/lt expression the way overlay does for output frame `frame`:
+# overlay numbers its frames from 1
+def evaluate(expression: str, frame: int) -> int:
+    python = expression.replace('if(', '_if(').replace('lt(', '_lt(')
+    return eval(python, {
+        '_if': lambda cond, a, b: a if cond else b,
+        '_lt': lambda a, b: a < b,
+        'n': frame + 1,
+    })
+
+@pytest.mark.parametrize('values', [
+    [7],
+    [3, 3, 3],
+    [0, 1],
+    [5, 5, 9, 9, 9, 2, HIDDEN, HIDDEN, 5],
+])
+def test_frame_expression_matches_every_frame(values):
+    expression = _frame_expression(values)
+    assert [evaluate(expression, i) for i in range(len(values))] == values
+
+def test_frame_expression_first_frame_is_timeline_frame_zero():
+    # A change on frame 1 must not show on frame 0
+    expression = _frame_expression([10, 20, 20])
+    assert evaluate(expression, 0) == 10
+    assert evaluate(expression, 1) == 20
+
+def test_frame_expression_random_tracks():
+    rng = random.Random(0)
+    for _ in range(50):
+        values = [rng.choice([0, 4, HIDDEN]) for _ in range(rng.randint(1, 80))]
+        expression = _frame_expression(values)
+        assert [evaluate(expression, i) for i in range(len(values))] == values
+
+def test_frame_expression_empty_track_is_hidden():
+    assert _frame_expression([]) == str(HIDDEN)
@@ -0,0 +1,45 @@
+from core.asset_manager import AssetManager
+from core.timeline import build_timeline
+from renderers.frame_renderer import FrameRenderer
+
+# Full, uncropped layers pasted one after another, as frames were first drawn
+def pasted_frame(assets: AssetManager, frame_state):
+    frame = assets.base.copy()
+    eyes = assets.get_eyes(frame_state.blinking)
+    frame.paste(eyes, frame_state.eye_position, eyes)
+    eyebrows = assets.get_eyebrows(frame_state.eyebrow_raised)
+    if eyebrows is not None:
+        frame.paste(eyebrows, frame_state.face_position, eyebrows)
+    mouth = assets.get_mouth(frame_state.mouth)
+    frame.paste(mouth, frame_state.face_position, mouth)
+    return frame
+
+def test_render_frame_matches_layer_pastes(analyzer, config):
+    assets = AssetManager(config)
+    assert assets.has_eyebrows
+    renderer = FrameRenderer(assets, config)
+    for frame_state in build_timeline(analyzer, config):
+        expected = pasted_frame(assets, frame_state)
+        assert renderer.render_frame(frame_state).tobytes() == expected.tobytes(), frame_state.frame_idx
+
+def test_draw_matches_render_frame(analyzer, config):
+    renderer = FrameRenderer(AssetManager(config), config)
+    for frame_state in build_timeline(analyzer, config):
+        frame, _ = renderer.draw(frame_state)
+        assert frame.tobytes() == renderer.render_frame(frame_state).tobytes(), frame_state.frame_idx
+
+# Watch mode draws only the frames an edit touched, in any order
+def test_draw_matches_render_frame_out_of_order(analyzer, config):
+    renderer = FrameRenderer(AssetManager(config), config)
+    timeline = build_timeline(analyzer, config)
+    for frame_state in timeline[::-3] + timeline[1::7]:
+        frame, _ = renderer.draw(frame_state)
+        assert frame.tobytes() == renderer.render_frame(frame_state).tobytes(), frame_state.frame_idx
+
+def test_draw_repeated_frame_is_clean(analyzer, config):
+    renderer = FrameRenderer(AssetManager(config), config)
+    frame_state = build_timeline(analyzer, config)[10]
+    _, dirty = renderer.draw(frame_state)
+    assert dirty
+    _, dirty = renderer.draw(frame_state)
+    assert dirty == []
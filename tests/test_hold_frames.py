@@ -0,0 +1,52 @@
+from dataclasses import replace
+
+import pytest
+
+from core.generator import AnimationGenerator
+from core.timeline import build_timeline, hold_frames
+
+@pytest.mark.parametrize('fps, rate, hold', [
+    (24, None, 1),
+    (24, 12, 2),
+    (24, 10, 2),  # 2.4 output frames per tick
+    (24, 7, 3),   # 3.4
+    (30, 8, 4),   # 3.75
+    (24, 48, 1),  # faster than the output
+])
+def test_hold_frames(config, fps, rate, hold):
+    config.output.fps = fps
+    config.animation.rate = rate
+    assert hold_frames(config) == hold
+
+@pytest.mark.parametrize('rate', [10, 7])
+def test_held_frames_repeat_their_tick(analyzer, config, rate):
+    config.animation.rate = rate
+    hold = hold_frames(config)
+    timeline = build_timeline(analyzer, config)
+
+    # 145 frames: the last tick holds fewer than `hold` frames
+    assert len(timeline) == analyzer.frames
+    assert analyzer.frames % hold
+    for i, frame_state in enumerate(timeline):
+        tick = timeline[i - i % hold]
+        assert frame_state.frame_idx == i
+        assert frame_state == replace(tick, frame_idx=i, time=i / config.output.fps)
+
+@pytest.mark.parametrize('rate', [10, 7])
+def test_split_held(analyzer, config, rate):
+    config.animation.rate = rate
+    hold = hold_frames(config)
+    generator = AnimationGenerator(config, analyzer=analyzer)
+    timeline = build_timeline(analyzer, config)
+
+    rendered, held = generator._split_held(timeline)
+    assert [f.frame_idx for f in rendered] == list(range(0, len(timeline), hold))
+    assert sorted(f.frame_idx for f in rendered + held) == list(range(len(timeline)))
+
+    # A slice that starts mid-tick renders the frames whose tick it lacks
+    frames = timeline[hold + 1:4 * hold + 1]
+    rendered, held = generator._split_held(frames)
+    ticks = {f.frame_idx for f in rendered}
+    assert {f.frame_idx for f in rendered} | {f.frame_idx for f in held} == {f.frame_idx for f in frames}
+    assert all(f.frame_idx - f.frame_idx % hold in ticks for f in held)
+    assert frames[0] in rendered
@@ -0,0 +1,48 @@
+import pytest
+
+import core.memory as memory
+from core.asset_manager import AssetManager
+from core.memory import plan_memory
+
+RSS_MB = 120.0
+FRAME_SIZE = (2048, 2048)
+
+@pytest.fixture
+def assets(config, monkeypatch) -> AssetManager:
+    monkeypatch.setattr(memory, 'current_rss_mb', lambda: RSS_MB)
+    config.performance.num_workers = 16
+    return AssetManager(config)
+
+# What the plan holds at its peak: workers, every frame in flight twice, the cache
+def planned_mb(plan, parallel: bool) -> float:
+    workers = plan.workers * plan.worker_mb if parallel else 0
+    return RSS_MB + workers + plan.queue_frames * 2 * plan.frame_mb + plan.cache_frames * plan.frame_mb
+
+@pytest.mark.parametrize('parallel', [True, False])
+@pytest.mark.parametrize('budget', [400, 800, 2000, 8000])
+def test_plan_stays_under_budget(config, assets, parallel, budget):
+    config.performance.max_memory_mb = budget
+    plan = plan_memory(config, assets, parallel, FRAME_SIZE)
+    assert plan.fits
+    assert planned_mb(plan, parallel) <= budget
+    assert 1 <= plan.batch_frames <= plan.queue_frames
+
+def test_plan_grows_with_budget(config, assets):
+    plans = []
+    for budget in (400, 2000):
+        config.performance.max_memory_mb = budget
+        plans.append(plan_memory(config, assets, True, FRAME_SIZE))
+    assert plans[0].workers <= plans[1].workers
+    assert plans[0].queue_frames <= plans[1].queue_frames
+
+def test_plan_below_minimum_still_runs(config, assets):
+    config.performance.max_memory_mb = RSS_MB + 1
+    plan = plan_memory(config, assets, True, FRAME_SIZE)
+    assert not plan.fits
+    assert plan.workers == 1 and plan.queue_frames == 1 and plan.batch_frames == 1
+
+def test_no_budget_uses_configured_values(config, assets):
+    config.performance.queue_frames = 5
+    config.performance.cache_frames = 3
+    plan = plan_memory(config, assets, True, FRAME_SIZE)
+    assert (plan.workers, plan.queue_frames, plan.cache_frames) == (16, 5, 3)
@@ -0,0 +1,14 @@
+import pytest
+
+from core.timeline import TimelineIndex, build_timeline
+
+@pytest.mark.parametrize('interval', [1, 17, 240])
+def test_frame_at_matches_state_pass(analyzer, config, interval):
+    timeline = build_timeline(analyzer, config)
+    index = TimelineIndex(analyzer, config, interval)
+    assert [index.frame_at(i) for i in range(len(timeline))] == timeline
+
+def test_frame_at_out_of_range(analyzer, config):
+    index = TimelineIndex(analyzer, config)
+    with pytest.raises(IndexError):
+        index.frame_at(analyzer.frames)
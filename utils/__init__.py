@@ -1,10 +1,16 @@
 from .config_loader import (
     Config,
     OutputConfig,
+    OutputTargetConfig,
+    EncoderProfileConfig,
+    ENCODER_PROFILES,
     AssetConfig,
     AudioConfig,
     AnimationConfig,
     PerformanceConfig,
+    LiveConfig,
+    CharacterConfig,
+    SceneConfig,
     DebugConfig,
     load_config
 )
@@ -17,14 +23,30 @@ from .lerp import (
     LerpValue,
     LerpPosition
 )
+from .events import (
+    Reporter,
+    EventReporter,
+    create_reporter,
+    open_event_stream
+)
+from .validation import (
+    ValidationReport,
+    validate_config
+)
 
 __all__ = [
     'Config',
     'OutputConfig',
+    'OutputTargetConfig',
+    'EncoderProfileConfig',
+    'ENCODER_PROFILES',
     'AssetConfig',
     'AudioConfig',
     'AnimationConfig',
     'PerformanceConfig',
+    'LiveConfig',
+    'CharacterConfig',
+    'SceneConfig',
     'DebugConfig',
     'load_config',
     'lerp',
@@ -34,4 +56,10 @@ __all__ = [
     'calculate_lerp_factor',
     'LerpValue',
     'LerpPosition',
+    'Reporter',
+    'EventReporter',
+    'create_reporter',
+    'open_event_stream',
+    'ValidationReport',
+    'validate_config',
 ]
\ No newline at end of file
@@ -3,15 +3,89 @@ from pathlib import Path
 from dataclasses import dataclass, field
 from typing import Dict, List, Tuple, Optional
 
+@dataclass
+class EncoderProfileConfig:
+    codec: str = "libx264"
+    preset: str = "medium"
+    tune: Optional[str] = None # x264/x265 tune, animation suits flat shading and sharp edges
+    crf: Optional[int] = None # constant quality, used instead of bitrate when set
+    bitrate: Optional[str] = None # average bitrate when crf is null
+    max_bitrate: Optional[str] = None # peak bitrate over one second, null for no cap
+    gop_seconds: Optional[float] = None # longest stretch between keyframes, null for the codec default
+    threads: Optional[int] = None # encoder threads, null for ffmpeg's choice (or the adaptive split)
+
+# Named profiles for this content: a mostly static image with small moving regions
+ENCODER_PROFILES: Dict[str, EncoderProfileConfig] = {
+    "draft": EncoderProfileConfig(preset="ultrafast", crf=28, gop_seconds=10.0),
+    "fast": EncoderProfileConfig(preset="veryfast", crf=23, gop_seconds=10.0),
+    "balanced": EncoderProfileConfig(preset="medium", tune="animation", crf=20, gop_seconds=10.0),
+    "quality": EncoderProfileConfig(preset="slow", tune="animation", crf=16, gop_seconds=10.0),
+    "stream": EncoderProfileConfig(preset="veryfast", tune="animation", bitrate="2M", max_bitrate="3M", gop_seconds=2.0),
+}
+
+@dataclass
+class OutputTargetConfig:
+    file: Optional[str] = None # null for output.video_file
+    size: Optional[Tuple[int, int]] = None # null for full frame size
+    profile: Optional[str] = None # null values fall back to the output section
+    codec: Optional[str] = None # null values fall back to the profile, then the output section
+    preset: Optional[str] = None
+    bitrate: Optional[str] = None
+    crf: Optional[int] = None
+    tune: Optional[str] = None
+    max_bitrate: Optional[str] = None
+    gop_seconds: Optional[float] = None
+    threads: Optional[int] = None
+
 @dataclass
 class OutputConfig:
     video_file: str = "output.mp4"
     fps: int = 24
     frame_size: Tuple[int, int] = (2048, 2048)
+    profile: Optional[str] = None # named encoder profile, null for video_codec, video_preset and video_bitrate
+    profiles: Dict[str, EncoderProfileConfig] = field(default_factory=dict) # own profiles, added to the built-in ones
     video_codec: str = "libx264"
     video_preset: str = "medium"
     video_bitrate: str = "5M"
     audio_bitrate: str = "192k"
+    keyframes: str = "speech" # speech (force a keyframe where speech starts) or none
+    keyframe_min_seconds: float = 2.0 # shortest gap between forced keyframes
+    targets: List[OutputTargetConfig] = field(default_factory=list)
+
+    # Profile by name, own profiles first
+    def get_profile(self, name: str) -> EncoderProfileConfig:
+        if name in self.profiles:
+            return self.profiles[name]
+        if name in ENCODER_PROFILES:
+            return ENCODER_PROFILES[name]
+        raise ValueError(f"Unknown encoder profile '{name}'")
+
+    # Resolved output targets (a single full size target if none are set).
+    # A target's own crf or bitrate replaces the profile's rate control.
+    def get_targets(self) -> List[OutputTargetConfig]:
+        targets = self.targets or [OutputTargetConfig()]
+        resolved = []
+        for t in targets:
+            name = t.profile or self.profile
+            if name:
+                profile = self.get_profile(name)
+            else:
+                profile = EncoderProfileConfig(self.video_codec, self.video_preset, bitrate=self.video_bitrate)
+            own_rate = t.crf is not None or t.bitrate is not None
+            resolved.append(OutputTargetConfig(
+                file=t.file or self.video_file,
+                size=tuple(t.size) if t.size else None,
+                profile=name,
+                codec=t.codec or profile.codec,
+                preset=t.preset or profile.preset,
+                bitrate=t.bitrate if own_rate else profile.bitrate,
+                crf=t.crf if own_rate else profile.crf,
+                tune=t.tune or profile.tune,
+                max_bitrate=t.max_bitrate or profile.max_bitrate,
+                gop_seconds=t.gop_seconds or profile.gop_seconds,
+                threads=t.threads or profile.threads,
+            ))
+        return resolved
 
 @dataclass
 class AssetConfig:
@@ -39,6 +113,8 @@ class AudioConfig:
     pitch_smoothing: int = 5
     emphasis_pitch_threshold: int = 85
     emphasis_energy_threshold: int = 85
+    sample_rate: Optional[int] = None # analysis sample rate, null for the file's own
+    decoder: str = "auto" # auto (ffmpeg streams compressed formats, librosa loads wav/flac), ffmpeg or librosa
 
 @dataclass
 class MouthAnimationConfig:
@@ -102,19 +178,58 @@ class AnimationConfig:
     breathing: BreathingConfig = field(default_factory=BreathingConfig)
     eyes: EyesConfig = field(default_factory=EyesConfig)
     eyebrows: EyebrowsConfig = field(default_factory=EyebrowsConfig)
+    seed: Optional[int] = None # null for a different animation every run
+    rate: Optional[float] = None # animation updates per second (12 = "on twos" at 24 fps), null for every frame
 
 @dataclass
 class PerformanceConfig:
+    backend: str = "python" # python (PIL frames) or ffmpeg (filter graph compositing)
     parallel: bool = True
     num_workers: Optional[int] = None
+    pipeline: bool = True # stream rendered frames into ffmpeg instead of writing PNGs
+    queue_frames: Optional[int] = None # frames in flight in the pipeline, null for 2 batches per worker
+    batch_frames: Optional[int] = None # timeline frames a worker renders into one block, null for ~64 MB of raw frames (at most 64)
+    stream_format: str = "yuv420p" # raw frames piped to ffmpeg: yuv420p (converted once per unique frame) or rgb24
+    cache_frames: int = 8 # recently composited frames reused by identical frames
+    adaptive_workers: bool = True # split cores between renderers and the encoder from measured speeds
+    max_memory_mb: Optional[float] = None # size workers, queues, cache and analysis blocks to fit
     cleanup_frames: bool = True
     frames_directory: str = "frames"
+    frame_format: str = "png" # frame files: png, raw (rgb24), npy (rgb24, memory-mapped), qoi or webp (lossless)
+    png_compress_level: int = 1 # zlib level 0-9 for png frames, 1 writes several times faster than 6 for slightly larger files
+    checkpoint_interval: int = 240 # frames between state snapshots for random access (--still)
+    segment_seconds: float = 2.0 # length of independently re-encodable video segments (--watch, --incremental)
+    incremental: bool = False # reuse unchanged segments from the previous run
+    cache_directory: str = ".cache" # segments and features kept between incremental runs
+
+@dataclass
+class LiveConfig:
+    sample_rate: int = 44100 # raw PCM input (s16le) sample rate
+    channels: int = 1 # raw PCM input channels, mixed down to mono
+    latency_ms: float = 150.0 # frames further behind than this are dropped
+    window_seconds: float = 10.0 # history for running normalization and percentiles
+
+@dataclass
+class CharacterConfig:
+    name: Optional[str] = None # label in logs, null for character_<n>
+    audio: Optional[str] = None # audio file driving this face, null for the main audio file
+    channel: Optional[int] = None # channel of that file (0 = left), null for a mono mix
+    assets: Optional[str] = None # asset directory, null for assets.directory (file names from the assets section)
+    position: Tuple[int, int] = (0, 0) # top-left corner on the canvas
+
+@dataclass
+class SceneConfig:
+    canvas: Optional[Tuple[int, int]] = None # null to fit every character
+    background: str = "#000000" # canvas color, or an image file scaled to the canvas
+    characters: List[CharacterConfig] = field(default_factory=list) # empty for a single face
 
 @dataclass
 class DebugConfig:
     keep_frames: bool = False
     show_progress: bool = True
     verbose: bool = False
+    events: Optional[str] = None # JSON-lines event file or fd number, replaces progress bars
+    event_interval: float = 1.0 # seconds between progress events
 
 # Main Config Object
 @dataclass
@@ -125,6 +240,8 @@ class Config:
     audio: AudioConfig = field(default_factory=AudioConfig)
     animation: AnimationConfig = field(default_factory=AnimationConfig)
     performance: PerformanceConfig = field(default_factory=PerformanceConfig)
+    live: LiveConfig = field(default_factory=LiveConfig)
+    scene: SceneConfig = field(default_factory=SceneConfig)
     debug: DebugConfig = field(default_factory=DebugConfig)
 
 # Load config from yaml
@@ -139,7 +256,12 @@ def load_config(config_path: str, audio_file: str, **overrides) -> Config:
         yaml_data = {}
     
     # Build nested config objects
-    output_cfg = OutputConfig(**yaml_data.get('output', {}))
+    output_data = dict(yaml_data.get('output', {}))
+    output_data['targets'] = [OutputTargetConfig(**t) for t in output_data.get('targets') or []]
+    output_data['profiles'] = {
+        name: EncoderProfileConfig(**p) for name, p in (output_data.get('profiles') or {}).items()
+    }
+    output_cfg = OutputConfig(**output_data)
     assets_cfg = AssetConfig(**yaml_data.get('assets', {}))
     audio_cfg = AudioConfig(**yaml_data.get('audio', {}))
     
@@ -158,10 +280,16 @@ def load_config(config_path: str, audio_file: str, **overrides) -> Config:
         head_bob=head_bob_cfg,
         breathing=breathing_cfg,
         eyes=eyes_cfg,
-        eyebrows=eyebrows_cfg
+        eyebrows=eyebrows_cfg,
+        seed=anim_data.get('seed'),
+        rate=anim_data.get('rate')
     )
     
     performance_cfg = PerformanceConfig(**yaml_data.get('performance', {}))
+    live_cfg = LiveConfig(**yaml_data.get('live', {}))
+    scene_data = dict(yaml_data.get('scene') or {})
+    scene_data['characters'] = [CharacterConfig(**c) for c in scene_data.get('characters') or []]
+    scene_cfg = SceneConfig(**scene_data)
     debug_cfg = DebugConfig(**yaml_data.get('debug', {}))
     
     # Create main config
@@ -172,6 +300,8 @@ def load_config(config_path: str, audio_file: str, **overrides) -> Config:
         audio=audio_cfg,
         animation=animation_cfg,
         performance=performance_cfg,
+        live=live_cfg,
+        scene=scene_cfg,
         debug=debug_cfg
     )
     
@@ -0,0 +1,219 @@
+import os
+import sys
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional, TextIO, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from utils import Config
+
+# Peak resident memory in MB: this process's, and that of the largest child
+# that has finished (pool workers, ffmpeg). The two peaks need not coincide,
+# so they are reported side by side rather than added up.
+def peak_rss_fields() -> Dict[str, Optional[float]]:
+    try:
+        import resource
+    except ImportError:
+        return {'peak_rss_mb': None, 'children_peak_rss_mb': None}
+    return {
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'children_peak_rss_mb': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    }
+
+# Console progress: print for messages, tqdm for progress bars
+class Reporter:
+    def __init__(self, config: 'Config'):
+        self.config = config
+
+    def info(self, text: str):
+        print(text)
+
+    # Verbose-only detail
+    def log(self, text: str):
+        if self.config.debug.verbose:
+            print(text)
+
+    def warning(self, text: str):
+        print(f"WARNING: {text}")
+
+    def error(self, text: str):
+        print(f"ERROR: {text}")
+
+    def output(self, file: str, kind: str = 'Video'):
+        print(f"✓ {kind} saved to: {file}")
+
+    # Hit rate of a cache, e.g. reused segments
+    def cache(self, name: str, hits: int, total: int):
+        self.log(f"{name}: {hits}/{total} reused")
+
+    @contextmanager
+    def stage(self, name: str):
+        yield
+
+    def progress(self, stage: str, total: int, desc: str) -> 'Progress':
+        if self.config.debug.show_progress:
+            return TqdmProgress(total, desc)
+        return Progress()
+
+# Counters behind a progress bar; the base class ignores everything
+class Progress:
+    def update(self, n: int = 1, busy: float = 0.0):
+        pass
+
+    # Secondary count or gauge (frames encoded, queue depth, ...)
+    def set(self, name: str, value):
+        pass
+
+    def close(self):
+        pass
+
+class TqdmProgress(Progress):
+    def __init__(self, total: int, desc: str):
+        from tqdm import tqdm
+        self.bar = tqdm(total=total, desc=desc)
+
+    def update(self, n: int = 1, busy: float = 0.0):
+        self.bar.update(n)
+
+    def close(self):
+        self.bar.close()
+
+# JSON-lines events for orchestrators instead of progress bars.
+# Messages still reach the console; progress is sampled every `interval`
+# seconds, so the per-frame cost is one counter bump and a clock read.
+class EventReporter(Reporter):
+    def __init__(self, config: 'Config', stream: TextIO, interval: float = 1.0):
+        super().__init__(config)
+        self.stream = stream
+        self.interval = interval
+        self.start = time.perf_counter()
+
+    # Pool workers get a copy without the stream, they never report
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['stream'] = None
+        return state
+
+    def emit(self, event: str, **fields):
+        if self.stream is None:
+            return
+        record = {'t': round(time.perf_counter() - self.start, 3), 'event': event}
+        record.update(fields)
+        try:
+            self.stream.write(json.dumps(record) + '\n')
+            self.stream.flush()
+        except (BrokenPipeError, ValueError):
+            pass
+
+    def info(self, text: str):
+        super().info(text)
+        self.emit('message', level='info', text=text)
+
+    def log(self, text: str):
+        super().log(text)
+        self.emit('message', level='debug', text=text)
+
+    def warning(self, text: str):
+        super().warning(text)
+        self.emit('message', level='warning', text=text)
+
+    def error(self, text: str):
+        super().error(text)
+        self.emit('message', level='error', text=text)
+
+    def output(self, file: str, kind: str = 'Video'):
+        super().output(file, kind)
+        self.emit('output', kind=kind.lower(), file=str(file))
+
+    def cache(self, name: str, hits: int, total: int):
+        super().cache(name, hits, total)
+        self.emit('cache', name=name, hits=hits, total=total,
+                  hit_rate=round(hits / total, 4) if total else None)
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        self.emit('stage_start', stage=name)
+        try:
+            yield
+        finally:
+            self.emit('stage_end', stage=name, seconds=round(time.perf_counter() - start, 3),
+                      **peak_rss_fields())
+
+    def progress(self, stage: str, total: int, desc: str) -> Progress:
+        return EventProgress(self, stage, total)
+
+class EventProgress(Progress):
+    def __init__(self, reporter: EventReporter, stage: str, total: int):
+        self.reporter = reporter
+        self.stage = stage
+        self.total = total
+        self.done = 0
+        self.busy = 0.0
+        self.values: Dict[str, object] = {}
+
+        now = time.perf_counter()
+        self.started = now
+        self.next_emit = now + reporter.interval
+        self.samples = deque([(now, 0)], maxlen=5)
+
+    def update(self, n: int = 1, busy: float = 0.0):
+        self.done += n
+        self.busy += busy
+        now = time.perf_counter()
+        if now >= self.next_emit:
+            self.next_emit = now + self.reporter.interval
+            self._emit(now)
+
+    def set(self, name: str, value):
+        self.values[name] = value
+
+    def close(self):
+        self._emit(time.perf_counter())
+
+    def _emit(self, now: float):
+        # Rolling rate over the last few samples
+        self.samples.append((now, self.done))
+        then, done_then = self.samples[0]
+        fps = (self.done - done_then) / (now - then) if now > then else 0.0
+
+        fields = {
+            'stage': self.stage,
+            'done': self.done,
+            'total': self.total,
+            'fps': round(fps, 2),
+            'eta': round((self.total - self.done) / fps, 1) if fps > 0 else None,
+        }
+        workers = self.values.get('workers')
+        if workers and self.busy:
+            fields['worker_utilization'] = round(min(1.0, self.busy / ((now - self.started) * workers)), 3)
+        fields.update(self.values)
+        fields.update(peak_rss_fields())
+        self.reporter.emit('progress', **fields)
+
+# Event streams by target, so generators sharing a target share one stream
+_streams: Dict[str, TextIO] = {}
+
+# The stream for a debug.events target. Events on stdout (fd 1) get their own
+# handle on it and everything printed for people moves to stderr, so the
+# stream stays valid JSON lines.
+def open_event_stream(target: str) -> TextIO:
+    if target not in _streams:
+        if target.isdigit() and int(target) == 1:
+            sys.stdout.flush()
+            _streams[target] = os.fdopen(os.dup(1), 'w', buffering=1)
+            sys.stdout = sys.stderr
+        elif target.isdigit():
+            _streams[target] = os.fdopen(int(target), 'w', buffering=1)
+        else:
+            _streams[target] = open(target, 'w', buffering=1)
+    return _streams[target]
+
+# Console reporter, or JSON events when debug.events names a file or fd
+def create_reporter(config: 'Config') -> Reporter:
+    target = config.debug.events
+    if not target:
+        return Reporter(config)
+    return EventReporter(config, open_event_stream(target), config.debug.event_interval)
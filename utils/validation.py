@@ -0,0 +1,253 @@
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from utils import Config, EncoderProfileConfig
+
+BACKENDS = ("python", "ffmpeg")
+STREAM_FORMATS = ("yuv420p", "rgb24")
+FRAME_FORMATS = ("png", "raw", "npy", "qoi", "webp")
+DECODERS = ("auto", "ffmpeg", "librosa")
+KEYFRAMES = ("speech", "none")
+
+VIDEO_PRESETS = (
+    "ultrafast", "superfast", "veryfast", "faster", "fast",
+    "medium", "slow", "slower", "veryslow",
+)
+
+@dataclass
+class ValidationReport:
+    errors: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+# Validate config values and assets (never touches the audio stack)
+def validate_config(config: 'Config') -> ValidationReport:
+    report = ValidationReport()
+    _check_output(config, report)
+    _check_audio(config, report)
+    _check_animation(config, report)
+    _check_assets(config, report)
+    _check_performance(config, report)
+    _check_live(config, report)
+    _check_scene(config, report)
+    return report
+
+# Output Settings
+def _check_output(config: 'Config', report: ValidationReport):
+    output = config.output
+    if output.fps <= 0:
+        report.errors.append(f"output.fps must be positive (got {output.fps})")
+    if len(output.frame_size) != 2 or any(int(v) <= 0 for v in output.frame_size):
+        report.errors.append(f"output.frame_size must be two positive ints (got {output.frame_size})")
+    if output.video_preset not in VIDEO_PRESETS:
+        report.warnings.append(f"output.video_preset '{output.video_preset}' is not a standard x264 preset")
+    if output.keyframes not in KEYFRAMES:
+        report.errors.append(f"output.keyframes must be one of {', '.join(KEYFRAMES)} (got '{output.keyframes}')")
+    if output.keyframe_min_seconds < 0:
+        report.errors.append("output.keyframe_min_seconds must not be negative")
+
+    for name, profile in output.profiles.items():
+        _check_profile(f"output.profiles.{name}", profile, report)
+    names = [output.profile] + [t.profile for t in output.targets]
+    unknown = False
+    for name in dict.fromkeys(n for n in names if n):
+        try:
+            output.get_profile(name)
+        except ValueError as e:
+            report.errors.append(str(e))
+            unknown = True
+    if unknown:
+        return
+
+    targets = output.get_targets()
+    files = [t.file for t in targets]
+    for target in targets:
+        if target.size is not None and (len(target.size) != 2 or any(int(v) <= 0 for v in target.size)):
+            report.errors.append(f"output target {target.file} size must be two positive ints (got {target.size})")
+        if target.crf is None and not target.bitrate:
+            report.errors.append(f"output target {target.file} needs a crf or a bitrate")
+        if target.gop_seconds is not None and target.gop_seconds <= 0:
+            report.errors.append(f"output target {target.file} gop_seconds must be positive")
+        if target.threads is not None and target.threads < 1:
+            report.errors.append(f"output target {target.file} threads must be at least 1")
+    for file in sorted({f for f in files if files.count(f) > 1}):
+        report.errors.append(f"output target file {file} is used more than once")
+
+def _check_profile(label: str, profile: 'EncoderProfileConfig', report: ValidationReport):
+    if profile.preset not in VIDEO_PRESETS:
+        report.warnings.append(f"{label}.preset '{profile.preset}' is not a standard x264 preset")
+    if profile.crf is not None and not 0 <= profile.crf <= 51:
+        report.errors.append(f"{label}.crf must be between 0 and 51 (got {profile.crf})")
+
+# Performance Settings
+def _check_performance(config: 'Config', report: ValidationReport):
+    if config.performance.backend not in BACKENDS:
+        report.errors.append(
+            f"performance.backend must be one of {', '.join(BACKENDS)} (got '{config.performance.backend}')"
+        )
+    if config.performance.checkpoint_interval < 1:
+        report.errors.append("performance.checkpoint_interval must be at least 1")
+    if config.performance.queue_frames is not None and config.performance.queue_frames < 1:
+        report.errors.append("performance.queue_frames must be at least 1")
+    if config.performance.batch_frames is not None and config.performance.batch_frames < 1:
+        report.errors.append("performance.batch_frames must be at least 1")
+    if config.performance.stream_format not in STREAM_FORMATS:
+        report.errors.append(
+            f"performance.stream_format must be one of {', '.join(STREAM_FORMATS)} "
+            f"(got '{config.performance.stream_format}')"
+        )
+    if config.performance.frame_format not in FRAME_FORMATS:
+        report.errors.append(
+            f"performance.frame_format must be one of {', '.join(FRAME_FORMATS)} "
+            f"(got '{config.performance.frame_format}')"
+        )
+    elif config.performance.frame_format in ("qoi", "webp") and not _can_write(config.performance.frame_format):
+        report.errors.append(
+            f"performance.frame_format '{config.performance.frame_format}' is not supported by the installed Pillow"
+        )
+    if not 0 <= config.performance.png_compress_level <= 9:
+        report.errors.append(f"performance.png_compress_level must be 0-9 (got {config.performance.png_compress_level})")
+    if config.performance.cache_frames < 0:
+        report.errors.append("performance.cache_frames must not be negative")
+    if config.performance.max_memory_mb is not None and config.performance.max_memory_mb <= 0:
+        report.errors.append("performance.max_memory_mb must be positive")
+    if config.performance.segment_seconds <= 0:
+        report.errors.append("performance.segment_seconds must be positive")
+    if config.performance.incremental and config.performance.backend == 'ffmpeg':
+        report.warnings.append("performance.incremental renders with the python backend, performance.backend is ignored")
+
+# Live Mode Settings
+def _check_live(config: 'Config', report: ValidationReport):
+    live = config.live
+    if live.sample_rate <= 0:
+        report.errors.append(f"live.sample_rate must be positive (got {live.sample_rate})")
+    if live.channels < 1:
+        report.errors.append(f"live.channels must be at least 1 (got {live.channels})")
+    if live.latency_ms < 0:
+        report.errors.append(f"live.latency_ms must not be negative (got {live.latency_ms})")
+    if live.window_seconds <= 0:
+        report.errors.append(f"live.window_seconds must be positive (got {live.window_seconds})")
+
+# Scene Settings (several characters on one canvas)
+def _check_scene(config: 'Config', report: ValidationReport):
+    scene = config.scene
+    if scene.canvas is not None:
+        if len(scene.canvas) != 2 or any(int(v) <= 0 for v in scene.canvas):
+            report.errors.append(f"scene.canvas must be two positive ints (got {scene.canvas})")
+        elif any(int(v) % 2 for v in scene.canvas):
+            report.warnings.append(f"scene.canvas {tuple(scene.canvas)} has an odd side, yuv420p encoders need even sizes")
+
+    names = []
+    for i, character in enumerate(scene.characters):
+        name = character.name or f"character_{i}"
+        names.append(name)
+        if len(character.position) != 2 or any(int(v) < 0 for v in character.position):
+            report.errors.append(f"scene character {name} position must be two non-negative ints (got {character.position})")
+        if character.channel is not None and character.channel < 0:
+            report.errors.append(f"scene character {name} channel must not be negative (got {character.channel})")
+        if character.audio and not Path(character.audio).is_file():
+            report.errors.append(f"scene character {name} audio {character.audio} not found")
+        if character.assets:
+            base = Path(character.assets) / config.assets.base
+            if not base.is_file():
+                report.errors.append(f"scene character {name} base image {base} not found")
+    for name in sorted({n for n in names if names.count(n) > 1}):
+        report.errors.append(f"scene character name {name} is used more than once")
+
+# Audio Analysis Settings
+def _check_audio(config: 'Config', report: ValidationReport):
+    audio = config.audio
+    if audio.pitch_min >= audio.pitch_max:
+        report.errors.append(f"audio.pitch_min ({audio.pitch_min}) must be below audio.pitch_max ({audio.pitch_max})")
+    for name in ('emphasis_pitch_threshold', 'emphasis_energy_threshold'):
+        value = getattr(audio, name)
+        if not 0 <= value <= 100:
+            report.errors.append(f"audio.{name} is a percentile and must be in [0, 100] (got {value})")
+    if audio.decoder not in DECODERS:
+        report.errors.append(f"audio.decoder must be one of {', '.join(DECODERS)} (got '{audio.decoder}')")
+    if audio.sample_rate is not None and audio.sample_rate < 2 * audio.pitch_max:
+        report.errors.append(
+            f"audio.sample_rate ({audio.sample_rate}) must be at least twice audio.pitch_max ({audio.pitch_max})"
+        )
+
+# Animation Settings
+def _check_animation(config: 'Config', report: ValidationReport):
+    anim = config.animation
+    if anim.mouth.small_threshold > anim.mouth.medium_threshold:
+        report.errors.append("animation.mouth.small_threshold must not exceed medium_threshold")
+    if anim.blink.min_interval > anim.blink.max_interval:
+        report.errors.append("animation.blink.min_interval must not exceed max_interval")
+    if anim.blink.duration <= 0:
+        report.errors.append("animation.blink.duration must be positive")
+    if anim.eyes.dart_duration <= 0:
+        report.errors.append("animation.eyes.dart_duration must be positive")
+    if not 0 <= anim.eyes.dart_chance <= 1:
+        report.errors.append("animation.eyes.dart_chance must be in [0, 1]")
+
+    if anim.rate is not None:
+        if anim.rate <= 0:
+            report.errors.append(f"animation.rate must be positive (got {anim.rate})")
+        elif anim.rate > config.output.fps:
+            report.warnings.append(f"animation.rate ({anim.rate}) is above output.fps, every frame is animated")
+        elif config.output.fps % anim.rate:
+            report.warnings.append(
+                f"animation.rate ({anim.rate}) does not divide output.fps, "
+                f"ticks are held {max(1, round(config.output.fps / anim.rate))} frames"
+            )
+
+    for section in ('mouth', 'head_bob', 'breathing', 'eyes', 'eyebrows'):
+        if getattr(anim, section).lerp_speed < 0:
+            report.errors.append(f"animation.{section}.lerp_speed must not be negative")
+
+# Asset Files (reads image headers only)
+def _check_assets(config: 'Config', report: ValidationReport):
+    asset_dir = Path(config.assets.directory)
+    if not asset_dir.is_dir():
+        report.errors.append(f"Assets directory not found: {asset_dir}")
+        return
+
+    required = [config.assets.base, config.assets.eyes_open, config.assets.eyes_closed]
+    required += list(config.assets.mouths.values())
+    if 'closed' not in config.assets.mouths:
+        report.errors.append("assets.mouths must define a 'closed' mouth")
+
+    base_size = _image_size(asset_dir / config.assets.base, report)
+    for name in required[1:]:
+        size = _image_size(asset_dir / name, report)
+        if size and base_size and size != base_size:
+            report.warnings.append(f"Asset {name} is {size[0]}x{size[1]}, base is {base_size[0]}x{base_size[1]}")
+
+    # Eyebrows are optional, but need both images
+    eyebrows = [asset_dir / config.assets.eyebrows.get(k, '') for k in ('normal', 'raised')]
+    present = [p.is_file() for p in eyebrows]
+    if any(present) and not all(present):
+        report.warnings.append("Only one eyebrow image found, eyebrows will be disabled")
+
+    if base_size and tuple(base_size) != tuple(config.output.frame_size) and not config.scene.characters:
+        report.warnings.append(
+            f"output.frame_size {tuple(config.output.frame_size)} differs from base image size {base_size}"
+        )
+
+def _image_size(path: Path, report: ValidationReport) -> Optional[Tuple[int, int]]:
+    if not path.is_file():
+        report.errors.append(f"Asset {path.name} not found in {path.parent}")
+        return None
+
+    from PIL import Image
+    try:
+        with Image.open(path) as img:
+            return img.size
+    except Exception as e:
+        report.errors.append(f"Asset {path.name} is not a readable image: {e}")
+        return None
+
+# Can the installed Pillow save this format (QOI needs Pillow 11.3+, WebP needs libwebp)
+def _can_write(frame_format: str) -> bool:
+    from PIL import Image
+    Image.init()
+    return frame_format.upper() in Image.SAVE